@@ -0,0 +1,146 @@
+# assets.py
+"""
+自行託管的靜態資源：第三方套件放在 static/vendor/，自己的 CSS/JS 放在 static/css、static/js。
+
+python build_assets.py 會把 static/ 下的檔案依內容雜湊重新命名後輸出到 static/dist/，
+同時產生 .gz (以及安裝 brotli 時的 .br) 預壓縮檔與 manifest.json。
+/assets/<雜湊檔名> 依 Accept-Encoding 直接送出預壓縮檔，並加上一年的
+Cache-Control: immutable；內容變更時檔名跟著變，不需要清除瀏覽器快取。
+
+樣板一律透過 asset_url('vendor/bootstrap/bootstrap.min.css') 取得網址：
+有 manifest 時回傳雜湊檔名；尚未建置時退回 /static/ 的原始檔。
+頁面不會從外部 CDN 載入任何檔案，static/vendor/ 缺檔時應用程式直接無法啟動，
+避免在離線環境中才發現頁面卡在載入外部資源。
+"""
+import os
+import json
+import mimetypes
+from flask import Blueprint, current_app, request, abort, send_file, url_for
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+# 第三方套件：static/ 下的路徑 -> 固定版本的上游網址。檔案已提交在 static/vendor/，
+# 更新版本時修改網址後執行 python build_assets.py --vendor --force 重新下載並提交。
+VENDOR_ASSETS = {
+    'vendor/bootstrap/bootstrap.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.8/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js':
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.8/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons/bootstrap-icons.min.css':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.min.css',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2',
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff':
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff',
+    'vendor/htmx/htmx.min.js':
+        'https://unpkg.com/htmx.org@1.9.2/dist/htmx.min.js',
+    'vendor/jquery/jquery.min.js':
+        'https://code.jquery.com/jquery-3.6.0.min.js',
+    'vendor/select2/select2.min.css':
+        'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/css/select2.min.css',
+    'vendor/select2/select2.min.js':
+        'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/js/select2.min.js',
+    'vendor/chart.js/chart.umd.js':
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js',
+}
+
+# 預壓縮的編碼，依偏好順序
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# 部分系統的 mimetypes 沒有登錄網頁字型
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('font/woff', '.woff')
+
+bp = Blueprint('assets', __name__)
+
+
+def missing_vendor_assets():
+    """回傳 VENDOR_ASSETS 中不存在於 static/ 的檔案。"""
+    return [path for path in VENDOR_ASSETS if not os.path.isfile(os.path.join(STATIC_DIR, path))]
+
+
+class Assets:
+
+    def __init__(self):
+        self.manifest = {}
+        self._manifest_mtime = None
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_DIST_DIR', DIST_DIR)
+        app.extensions['assets'] = self
+        self.load_manifest(app.config['ASSETS_DIST_DIR'])
+        missing = missing_vendor_assets()
+        if missing:
+            raise RuntimeError(f"static/vendor/ 缺少第三方套件：{', '.join(missing)}"
+                               "，請執行 python build_assets.py --vendor 下載後提交。")
+        app.register_blueprint(bp)
+        app.jinja_env.globals['asset_url'] = self.url
+
+    def load_manifest(self, dist_dir):
+        path = os.path.join(dist_dir, MANIFEST_NAME)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            self.manifest = {}
+            self._manifest_mtime = None
+            return
+        if mtime != self._manifest_mtime:
+            with open(path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            self._manifest_mtime = mtime
+
+    def url(self, path):
+        """樣板中的 asset_url()：回傳 static/ 下 path 對應的網址。"""
+        if current_app.debug:
+            # 開發時重新建置後不必重啟
+            self.load_manifest(current_app.config['ASSETS_DIST_DIR'])
+        hashed = self.manifest.get(path)
+        if hashed:
+            return url_for('assets.serve', filename=hashed)
+        return url_for('static', filename=path)
+
+
+assets = Assets()
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+@bp.route('/assets/<path:filename>')
+def serve(filename):
+    dist_dir = current_app.config['ASSETS_DIST_DIR']
+    path = os.path.realpath(os.path.join(dist_dir, filename))
+    if (filename == MANIFEST_NAME or not path.startswith(os.path.realpath(dist_dir) + os.sep)
+            or not os.path.isfile(path)):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accepted = _accepted_encodings(request.headers.get('Accept-Encoding'))
+    encoding = None
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, name
+            break
+
+    response = send_file(path, mimetype=mimetype, max_age=CACHE_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
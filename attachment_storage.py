@@ -0,0 +1,362 @@
+# attachment_storage.py
+"""
+附件檔案的維護：刪除附件時移除檔案、孤兒檔案回收與容量統計。
+
+刪除 Attachment (刪除附件、刪除案例時的 cascade) 時，檔案在 commit 成功後才移除；
+rollback 時保留檔案，移除失敗的檔案則留給回收作業處理。
+
+回收作業 (collect_garbage) 讓附件目錄與 Attachment 資料表保持一致：
+1. 以 os.scandir 逐批掃描附件目錄，每批以一次 IN 查詢比對 Attachment.filepath，
+   不需要把整個目錄或資料表載入記憶體。
+2. 沒有對應資料列、且修改時間超過 ATTACHMENT_GC_GRACE_SECONDS 的檔案
+   (避免誤判剛上傳、尚未 commit 的檔案) 移到隔離目錄 ATTACHMENT_QUARANTINE_FOLDER/<日期>/。
+3. 隔離超過 ATTACHMENT_QUARANTINE_DAYS 天的檔案才真正刪除；刪除前再確認一次，
+   期間又被引用的檔案會移回附件目錄。
+4. 逐批檢查 Attachment 資料列，回填檔案大小並統計檔案已遺失的附件。
+每處理一個檔案都經過 ATTACHMENT_GC_MAX_FILES_PER_SECOND 限速，上班時間執行也不會
+佔滿磁碟 I/O。可執行 python storage_maintenance.py，或設定
+ATTACHMENT_GC_INTERVAL_SECONDS 讓 worker 在背景定期執行。
+"""
+import os
+import time
+import random
+import shutil
+import logging
+import threading
+from datetime import datetime, timedelta
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import object_session
+
+from extensions import db
+from models import Attachment, TestCase
+from db_concurrency import serialized_write
+
+try:
+    import fcntl
+except ImportError:  # Windows 開發環境沒有 fcntl，只以行程內的鎖避免重複執行
+    fcntl = None
+
+logger = logging.getLogger('testcase.attachments')
+
+SCAN_BATCH_SIZE = 500
+QUARANTINE_DATE_FORMAT = '%Y%m%d'
+
+GcResult = namedtuple('GcResult', ['scanned', 'quarantined', 'quarantined_bytes', 'purged', 'purged_bytes',
+                                   'restored', 'missing', 'sizes_updated'])
+StorageReport = namedtuple('StorageReport', ['total_files', 'total_bytes', 'unknown_size', 'by_product', 'by_case',
+                                             'quarantine_files', 'quarantine_bytes'])
+
+_run_lock = threading.Lock()
+
+
+class Throttle:
+    """限制每秒處理的檔案數；per_second 為 0 時不限速。"""
+
+    def __init__(self, per_second):
+        self.per_second = per_second
+        self._start = time.monotonic()
+        self._count = 0
+
+    def tick(self, count=1):
+        if not self.per_second:
+            return
+        self._count += count
+        ahead = self._count / self.per_second - (time.monotonic() - self._start)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def attachment_path(filepath):
+    return os.path.join(current_app.config['ATTACHMENT_FOLDER'], filepath)
+
+
+# --- 刪除附件時，commit 後才移除檔案 ---
+
+@event.listens_for(Attachment, 'after_delete')
+def _schedule_file_removal(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('attachment_files_to_remove', []).append(attachment_path(target.filepath))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _remove_files_after_commit(session):
+    for path in session.info.pop('attachment_files_to_remove', []):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning('無法刪除附件檔案 %s：%s (留給回收作業處理)', path, e)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _keep_files_after_rollback(session):
+    session.info.pop('attachment_files_to_remove', None)
+
+
+# --- 孤兒檔案回收 ---
+
+def _referenced(filepaths):
+    """回傳 filepaths 中仍被 Attachment 引用的檔名集合。"""
+    if not filepaths:
+        return set()
+    return {filepath for filepath, in (db.session.query(Attachment.filepath)
+                                       .filter(Attachment.filepath.in_(filepaths)))}
+
+
+def _scan_batches(folder, throttle):
+    """逐批產生附件目錄下的 [(檔名, os.DirEntry)] (只包含一般檔案)。"""
+    batch = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            throttle.tick()
+            if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                continue
+            batch.append(entry)
+            if len(batch) >= SCAN_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _quarantine_orphans(folder, quarantine_folder, grace_seconds, throttle, dry_run):
+    scanned = quarantined = quarantined_bytes = 0
+    cutoff = time.time() - grace_seconds
+    target_dir = os.path.join(quarantine_folder, datetime.now().strftime(QUARANTINE_DATE_FORMAT))
+    for batch in _scan_batches(folder, throttle):
+        scanned += len(batch)
+        referenced = _referenced([entry.name for entry in batch])
+        # 每批查詢後立即結束讀取交易，長時間的掃描不會妨礙 WAL checkpoint
+        db.session.rollback()
+        for entry in batch:
+            if entry.name in referenced:
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                continue
+            quarantined += 1
+            quarantined_bytes += stat.st_size
+            if dry_run:
+                continue
+            os.makedirs(target_dir, exist_ok=True)
+            shutil.move(entry.path, os.path.join(target_dir, entry.name))
+            logger.info('已隔離孤兒附件 %s (%d bytes)', entry.name, stat.st_size)
+    return scanned, quarantined, quarantined_bytes
+
+
+def _purge_quarantine(folder, quarantine_folder, retention_days, throttle, dry_run):
+    purged = purged_bytes = restored = 0
+    if not os.path.isdir(quarantine_folder):
+        return purged, purged_bytes, restored
+    expire_before = (datetime.now() - timedelta(days=retention_days)).strftime(QUARANTINE_DATE_FORMAT)
+
+    for day in sorted(os.listdir(quarantine_folder)):
+        day_dir = os.path.join(quarantine_folder, day)
+        if not os.path.isdir(day_dir) or day >= expire_before:
+            continue
+        for batch in _scan_batches(day_dir, throttle):
+            referenced = _referenced([entry.name for entry in batch])
+            db.session.rollback()
+            for entry in batch:
+                if entry.name in referenced:
+                    restored += 1
+                    if not dry_run:
+                        shutil.move(entry.path, os.path.join(folder, entry.name))
+                        logger.warning('隔離中的附件 %s 仍被引用，已移回附件目錄', entry.name)
+                    continue
+                purged += 1
+                purged_bytes += entry.stat(follow_symlinks=False).st_size
+                if not dry_run:
+                    os.remove(entry.path)
+        if not dry_run and not os.listdir(day_dir):
+            os.rmdir(day_dir)
+    return purged, purged_bytes, restored
+
+
+def _reconcile_rows(throttle, dry_run):
+    """逐批檢查 Attachment 資料列：回填 (或更正) 檔案大小，並統計檔案已遺失的附件。"""
+    missing = sizes_updated = 0
+    last_id = 0
+    while True:
+        rows = (db.session.query(Attachment.id, Attachment.filepath, Attachment.size)
+                .filter(Attachment.id > last_id)
+                .order_by(Attachment.id)
+                .limit(SCAN_BATCH_SIZE)
+                .all())
+        db.session.rollback()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        updates = []
+        for row in rows:
+            throttle.tick()
+            try:
+                size = os.path.getsize(attachment_path(row.filepath))
+            except OSError:
+                missing += 1
+                logger.warning('附件 #%d 的檔案 %s 不存在', row.id, row.filepath)
+                continue
+            if size != row.size:
+                updates.append({'id': row.id, 'size': size})
+        sizes_updated += len(updates)
+        if updates and not dry_run:
+            with serialized_write():
+                db.session.bulk_update_mappings(Attachment, updates)
+                db.session.commit()
+    return missing, sizes_updated
+
+
+def collect_garbage(dry_run=False):
+    """
+    執行一次完整的回收作業，回傳 GcResult。dry_run=True 時只統計，不搬移、刪除或更新。
+    同一時間只會有一個行程在執行；已有其他行程在執行時回傳 None。
+    """
+    config = current_app.config
+    folder = config['ATTACHMENT_FOLDER']
+    quarantine_folder = config['ATTACHMENT_QUARANTINE_FOLDER']
+    throttle = Throttle(config['ATTACHMENT_GC_MAX_FILES_PER_SECOND'])
+
+    with _exclusive_run(config['ATTACHMENT_GC_LOCK_PATH']) as acquired:
+        if not acquired:
+            return None
+        scanned, quarantined, quarantined_bytes = _quarantine_orphans(
+            folder, quarantine_folder, config['ATTACHMENT_GC_GRACE_SECONDS'], throttle, dry_run)
+        purged, purged_bytes, restored = _purge_quarantine(
+            folder, quarantine_folder, config['ATTACHMENT_QUARANTINE_DAYS'], throttle, dry_run)
+        missing, sizes_updated = _reconcile_rows(throttle, dry_run)
+
+    return GcResult(scanned, quarantined, quarantined_bytes, purged, purged_bytes, restored, missing, sizes_updated)
+
+
+class _exclusive_run:
+    """不等待的跨行程鎖：已被其他行程持有時 acquired 為 False。"""
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self._file = None
+        self._locked = False
+
+    def __enter__(self):
+        if not _run_lock.acquire(blocking=False):
+            return False
+        self._locked = True
+        if fcntl is None or not self.lock_path:
+            return True
+        self._file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._release()
+            return False
+        return True
+
+    def __exit__(self, exc_type, exc, tb):
+        self._release()
+
+    def _release(self):
+        if self._file is not None:
+            self._file.close()  # 關閉檔案即釋放 flock
+            self._file = None
+        if self._locked:
+            _run_lock.release()
+            self._locked = False
+
+
+# --- 容量統計 ---
+
+def _folder_usage(folder):
+    files = total = 0
+    for root, _, names in os.walk(folder):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+                files += 1
+            except OSError:
+                continue
+    return files, total
+
+
+def storage_report(top=20):
+    """
+    依 Attachment.size 統計附件容量：by_product 為 [(產品, 檔案數, bytes)]，
+    by_case 為用量最大的 top 個案例 [(id, Case ID, 產品, 檔案數, bytes)]。
+    unknown_size 為尚未回填大小的附件數 (執行一次回收作業後即會補上)。
+    """
+    size = func.coalesce(func.sum(Attachment.size), 0)
+    total_files, total_bytes, unknown_size = db.session.query(
+        func.count(Attachment.id), size, func.count(Attachment.id) - func.count(Attachment.size)).one()
+    by_product = (db.session.query(TestCase.product_type, func.count(Attachment.id), size)
+                  .join(Attachment, Attachment.test_case_id == TestCase.id)
+                  .group_by(TestCase.product_type)
+                  .order_by(size.desc())
+                  .all())
+    by_case = (db.session.query(TestCase.id, TestCase.case_id, TestCase.product_type,
+                                func.count(Attachment.id), size)
+               .join(Attachment, Attachment.test_case_id == TestCase.id)
+               .group_by(TestCase.id)
+               .order_by(size.desc(), TestCase.case_id)
+               .limit(top)
+               .all())
+    quarantine_files, quarantine_bytes = _folder_usage(current_app.config['ATTACHMENT_QUARANTINE_FOLDER'])
+    return StorageReport(total_files, total_bytes, unknown_size,
+                         [tuple(row) for row in by_product], [tuple(row) for row in by_case],
+                         quarantine_files, quarantine_bytes)
+
+
+# --- 背景執行 ---
+
+class AttachmentMaintenance:
+    """設定 ATTACHMENT_GC_INTERVAL_SECONDS 後，每個 worker 在背景定期嘗試執行回收作業。"""
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('ATTACHMENT_QUARANTINE_FOLDER',
+                          os.path.join(os.path.dirname(config['ATTACHMENT_FOLDER']), 'attachment_quarantine'))
+        config.setdefault('ATTACHMENT_QUARANTINE_DAYS', 7)
+        config.setdefault('ATTACHMENT_GC_GRACE_SECONDS', 3600)
+        config.setdefault('ATTACHMENT_GC_MAX_FILES_PER_SECOND', 200)
+        config.setdefault('ATTACHMENT_GC_LOCK_PATH', os.path.join(app.instance_path, 'attachment-gc.lock'))
+        # 0 代表不在背景執行，只能手動執行 storage_maintenance.py
+        config.setdefault('ATTACHMENT_GC_INTERVAL_SECONDS', 0)
+        app.extensions['attachment_maintenance'] = self
+
+        if config['ATTACHMENT_GC_INTERVAL_SECONDS']:
+            # preload 模式下 app 在 master 建立，執行緒不會跟著 fork，因此在 worker 處理第一個請求時才啟動
+            app.before_request(lambda: self._ensure_started(app))
+
+    def _ensure_started(self, app):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, args=(app,), name='attachment-gc', daemon=True).start()
+
+    def _run(self, app):
+        interval = app.config['ATTACHMENT_GC_INTERVAL_SECONDS']
+        while True:
+            # 加上隨機延遲，避免所有 worker 同時醒來搶鎖
+            time.sleep(interval * random.uniform(0.9, 1.1))
+            with app.app_context():
+                try:
+                    result = collect_garbage()
+                except Exception:
+                    logger.exception('附件回收作業失敗')
+                    continue
+                finally:
+                    db.session.remove()
+                if result is not None:
+                    logger.info('附件回收完成：%s', result._asdict())
+
+
+attachment_maintenance = AttachmentMaintenance()
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""效能測試：合成資料產生器 (generate)、測試執行 (run) 與結果比較 (compare)。"""
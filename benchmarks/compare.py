@@ -0,0 +1,60 @@
+# benchmarks/compare.py
+"""
+比較兩次效能測試的 JSON 結果，列出 p50/p95 的變化。
+
+    python -m benchmarks.compare baseline.json current.json --threshold 1.2
+
+任何項目的 p95 變慢超過 threshold 倍時，以非零狀態碼結束，方便在 CI 中使用。
+"""
+import sys
+import json
+import argparse
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    rows = []
+    for size, benchmarks in current['sizes'].items():
+        base_benchmarks = baseline['sizes'].get(size, {})
+        for name, stats in benchmarks.items():
+            base = base_benchmarks.get(name)
+            if not base:
+                continue
+            p50_ratio = stats['p50_ms'] / base['p50_ms'] if base['p50_ms'] else float('inf')
+            p95_ratio = stats['p95_ms'] / base['p95_ms'] if base['p95_ms'] else float('inf')
+            rows.append((size, name, base['p50_ms'], stats['p50_ms'], p50_ratio, base['p95_ms'], stats['p95_ms'], p95_ratio))
+            if p95_ratio > threshold:
+                regressions.append((size, name, p95_ratio))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比較兩份效能測試結果')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=1.2, help='p95 變慢幾倍視為退步')
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    rows, regressions = compare(baseline, current, args.threshold)
+
+    print(f"baseline: {baseline['meta'].get('commit')}  current: {current['meta'].get('commit')}")
+    print(f"{'size':>7}  {'benchmark':<24} {'p50 old':>10} {'p50 new':>10} {'x':>6} {'p95 old':>10} {'p95 new':>10} {'x':>6}")
+    for size, name, p50_old, p50_new, p50_ratio, p95_old, p95_new, p95_ratio in rows:
+        print(f"{size:>7}  {name:<24} {p50_old:>10.2f} {p50_new:>10.2f} {p50_ratio:>6.2f} "
+              f"{p95_old:>10.2f} {p95_new:>10.2f} {p95_ratio:>6.2f}")
+
+    if regressions:
+        print('\n效能退步：')
+        for size, name, ratio in regressions:
+            print(f'  [{size}] {name}: p95 x{ratio:.2f}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# benchmarks/generate.py
+"""
+產生效能測試用的合成資料：
+- 仿照 Smail 測試計畫格式的多工作表 Excel (第一張表 A1 為全域前置條件，標頭列往下偏移)
+- 已填入 1k / 10k / 100k 筆案例的 SQLite 資料庫
+
+所有內容都由固定的 seed 產生，相同參數每次產出的資料都一樣。
+"""
+import os
+import json
+import random
+import sqlite3
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADER = ['Case ID', '測試項目', '測試目的', '前置條件', '測試步驟', '預期結果', '實際結果', '備註', '參考資料', '標籤']
+STATUSES = ['未執行', '進行中', '通過', '失敗']
+STATUS_WEIGHTS = [50, 10, 30, 10]
+TAG_POOL = ['regression', 'smoke', 'ui', 'api', 'security', 'performance', 'p1', 'p2', 'p3',
+            'blocked', '待確認', '自動化', '手動', '跨網域', 'ldap', 'imap', 'pop3', 'ews', 'sso', 'ha']
+
+SUBJECTS = ['系統管理者', '網域管理者', '群組管理者', '一般使用者', '稽核人員']
+ACTIONS = ['新增', '修改', '刪除', '查詢', '匯出', '匯入', '啟用', '停用', '排程', '同步']
+TARGETS = ['帳號', '郵件規則', '垃圾郵件特徵', '白名單', '黑名單', '歸檔政策', '保留期限', '網域設定',
+           '收件匣', '郵件列表', '附件過濾', '病毒掃描', 'DKIM 簽章', 'SPF 記錄', '憑證', '稽核日誌']
+PAGES = ['網域 > 過濾', '系統 > 設定', '帳號 > 帳號列表', '歸檔 > 搜尋', '報表 > 統計', '郵件 > 佇列']
+
+
+def _sentence(rng):
+    return f"{rng.choice(SUBJECTS)}{rng.choice(ACTIONS)}「{rng.choice(TARGETS)}」"
+
+
+def _numbered(rng, count, build):
+    return '\n'.join(f'{i}. {build(rng)}' for i in range(1, count + 1))
+
+
+def _step(rng):
+    return f"導覽至「{rng.choice(PAGES)}」，{_sentence(rng)}並點擊「儲存」。"
+
+
+def _expected(rng):
+    return f"畫面應顯示「{rng.choice(TARGETS)}」已{rng.choice(ACTIONS)}成功，且稽核日誌有對應紀錄。"
+
+
+def generate_case(rng, index, prefix='BENCH'):
+    """產生一筆案例的欄位內容 (key 與 Excel 標頭相同)。"""
+    return {
+        'Case ID': f'{prefix}-{index:06d}',
+        '測試項目': f"功能驗證 - {_sentence(rng)}",
+        '測試目的': f"驗證{_sentence(rng)}後，{rng.choice(TARGETS)}能正確生效。",
+        '前置條件': _numbered(rng, rng.randint(1, 4), lambda r: f"{r.choice(SUBJECTS)}已登入並具備{r.choice(TARGETS)}權限。"),
+        '測試步驟': _numbered(rng, rng.randint(3, 12), _step),
+        '預期結果': _numbered(rng, rng.randint(1, 5), _expected),
+        '實際結果': '',
+        '備註': rng.choice(['', '', '需搭配外部郵件伺服器', '依客戶環境調整']),
+        '參考資料': f"Spec#{rng.randint(400, 700)}",
+        '標籤': ', '.join(rng.sample(TAG_POOL, rng.randint(0, 3))),
+    }
+
+
+def generate_workbook(path, num_cases, sheets=4, seed=0, prefix='BENCH'):
+    """
+    產生一個多工作表的 Excel 測試計畫。
+    第一張表的 A1 放全域前置條件，標頭列在第 3 列；其餘工作表標頭在第 1 列。
+    """
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    per_sheet = max(1, num_cases // sheets)
+    index = 0
+
+    for sheet_number in range(sheets):
+        sheet = workbook.create_sheet(title=f"{rng.choice(TARGETS)}-{sheet_number + 1}")
+        if sheet_number == 0:
+            sheet.append([_numbered(rng, 4, lambda r: f"{r.choice(SUBJECTS)}帳號已建立並可正常登入。")])
+            sheet.append([])
+        sheet.append(HEADER)
+        count = per_sheet if sheet_number < sheets - 1 else num_cases - index
+        for _ in range(count):
+            case = generate_case(rng, index, prefix)
+            sheet.append([case[column] for column in HEADER])
+            index += 1
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    workbook.save(path)
+    return path
+
+
+def _load_rules():
+    with open(os.path.join(BASE_DIR, 'category_rules.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def generate_database(path, num_cases, seed=0):
+    """
+    建立一個已填入 num_cases 筆案例的 SQLite 資料庫。
+    資料表結構由 models.py 以 db.create_all() 建立，資料則直接批次寫入以加快速度。
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    from flask import Flask
+    from extensions import db
+    import models  # noqa: F401  註冊所有資料表
+
+    schema_app = Flask(__name__)
+    schema_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(schema_app)
+    with schema_app.app_context():
+        db.create_all()
+        db.engine.dispose()
+
+    rng = random.Random(seed)
+    rules = _load_rules()
+    gateway_rules = [rule for rule in rules['郵件閘道'] if isinstance(rule, dict)]
+    archive_rules = [rule for rule in rules['郵件歸檔'] if isinstance(rule, dict)]
+
+    connection = sqlite3.connect(path)
+    connection.executemany('INSERT INTO tag (id, name) VALUES (?, ?)',
+                           [(i + 1, name) for i, name in enumerate(TAG_POOL)])
+
+    case_rows = []
+    tag_rows = []
+    for index in range(num_cases):
+        case = generate_case(rng, index)
+        product = rng.choices(['郵件閘道', '郵件歸檔', 'Smail-Spec'], weights=[45, 35, 20])[0]
+        if product == 'Smail-Spec':
+            main_cat, sub_cat = f"Spec#{rng.randint(400, 700)}", None
+        else:
+            rule = rng.choice(gateway_rules if product == '郵件閘道' else archive_rules)
+            main_cat, sub_cat = rule['main_category'], rule['sub_category']
+        status = rng.choices(STATUSES, weights=STATUS_WEIGHTS)[0]
+        tag_names = [name.strip() for name in case['標籤'].split(',') if name.strip()]
+        case_rows.append((
+            index + 1, product, '', main_cat, sub_cat, case['Case ID'], case['測試項目'],
+            case['測試目的'], case['前置條件'], case['測試步驟'], case['預期結果'],
+            '符合預期' if status in ('通過', '失敗') else '', status, case['備註'], case['參考資料'],
+            ','.join(sorted(set(tag_names))),
+        ))
+        for tag_name in tag_names:
+            tag_rows.append((index + 1, TAG_POOL.index(tag_name) + 1))
+
+    connection.executemany(
+        'INSERT INTO test_case (id, product_type, category, main_category, sub_category, case_id, test_item, '
+        'test_purpose, preconditions, test_steps, expected_result, actual_result, status, notes, reference, '
+        'tag_names) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        case_rows
+    )
+    connection.executemany('INSERT INTO test_case_tags (test_case_id, tag_id) VALUES (?, ?)', tag_rows)
+    connection.commit()
+    connection.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='產生效能測試用的 Excel 與資料庫')
+    parser.add_argument('--output-dir', default=os.path.join(BASE_DIR, 'instance', 'benchmarks'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--workbook-cases', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workbook_path = os.path.join(args.output_dir, f'Smail_Test_Plan_Bench_{args.workbook_cases}.xlsx')
+    generate_workbook(workbook_path, args.workbook_cases, seed=args.seed)
+    print(f'已產生 {workbook_path}')
+    for size in args.sizes:
+        db_path = os.path.join(args.output_dir, f'bench_{size}.db')
+        generate_database(db_path, size, seed=args.seed)
+        print(f'已產生 {db_path}')
+
+
+if __name__ == '__main__':
+    main()
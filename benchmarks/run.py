@@ -0,0 +1,217 @@
+# benchmarks/run.py
+"""
+執行效能測試並輸出 JSON 結果。
+
+    python -m benchmarks.run --sizes 1000 10000 --output bench.json
+
+每個資料量會在獨立的子行程中執行 (資料庫位置由 DATABASE_URL 決定)，
+並使用資料庫與 category_rules.json 的暫存副本，活頁簿快取也放在暫存目錄，不會修改正式資料。
+結果可用 python -m benchmarks.compare old.json new.json 比較。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+from benchmarks.generate import BASE_DIR, generate_database, generate_workbook
+
+INDEX_QUERIES = {
+    'index': {},
+    'index_page_5': {'page': 5},
+    'index_status': {'q': 'status:通過'},
+    'index_tag': {'q': '#regression'},
+    'index_keyword': {'q': '垃圾郵件特徵'},
+    'index_combined': {'q': 'status:失敗 #smoke 帳號', 'product': '郵件閘道'},
+    'index_sub_category': {'product': '郵件閘道', 'main_category': '使用者介面', 'sub_category': '登入與登出'},
+}
+
+
+def summarize(samples):
+    """將耗時樣本 (秒) 整理成 p50/p95/平均值 (毫秒) 與每秒處理量。"""
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def pct(p):
+        return ordered[min(count - 1, int(round(p / 100 * (count - 1))))]
+
+    total = sum(ordered)
+    return {
+        'iterations': count,
+        'p50_ms': round(pct(50) * 1000, 3),
+        'p95_ms': round(pct(95) * 1000, 3),
+        'mean_ms': round(total / count * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'throughput_per_s': round(count / total, 2) if total else None,
+    }
+
+
+def measure(func, iterations, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _get(client, url, **query):
+    def call():
+        response = client.get(url, query_string=query)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{url} {query} 回應 {response.status_code}')
+    return call
+
+
+def run_single_size(size, iterations, data_dir, workbook_path, workbook_cache_dir):
+    """在目前行程中針對單一資料量執行所有測試 (由子行程呼叫)。"""
+    from app import create_app
+    from extensions import db
+    from models import TestCase
+    from services import process_excel_file
+    from utils import categorize_case
+
+    app = create_app({'WORKBOOK_CACHE_DIR': workbook_cache_dir})
+    client = app.test_client()
+    results = {}
+    rng = random.Random(size)
+
+    with app.app_context():
+        case_ids = [row.id for row in TestCase.query.with_entities(TestCase.id).all()]
+        sample_cases = TestCase.query.filter(TestCase.id.in_(rng.sample(case_ids, min(200, len(case_ids))))).all()
+        categorize_inputs = [({
+            '測試項目': case.test_item, '測試目的': case.test_purpose, '測試步驟': case.test_steps,
+            '預期結果': case.expected_result, 'category': case.category,
+        }, case.product_type) for case in sample_cases]
+
+    def categorize_all():
+        for case_data, product_type in categorize_inputs:
+            categorize_case(case_data, product_type)
+
+    stats = measure(categorize_all, iterations)
+    stats['cases_per_s'] = round(len(categorize_inputs) * 1000 / stats['mean_ms'], 1)
+    results['categorize_case'] = stats
+
+    def import_workbook():
+        with app.app_context():
+            with open(workbook_path, 'rb') as f:
+                process_excel_file(f, os.path.basename(workbook_path), '郵件閘道')
+
+    def remove_imported():
+        with app.app_context():
+            for case in TestCase.query.filter(TestCase.case_id.like('IMPORT-%')).all():
+                db.session.delete(case)
+            db.session.commit()
+
+    import_samples = []
+    for _ in range(max(1, min(iterations, 5))):
+        # 每次都清空活頁簿快取，量測的是包含解析 Excel 的完整匯入
+        shutil.rmtree(workbook_cache_dir, ignore_errors=True)
+        os.makedirs(workbook_cache_dir)
+        start = time.perf_counter()
+        import_workbook()
+        import_samples.append(time.perf_counter() - start)
+        remove_imported()
+    results['process_excel_file'] = summarize(import_samples)
+
+    for name, query in INDEX_QUERIES.items():
+        results[name] = measure(_get(client, '/', **query), iterations)
+    results['dashboard'] = measure(_get(client, '/dashboard'), iterations)
+    results['export_product'] = measure(_get(client, '/export', product='Smail-Spec'), max(1, min(iterations, 3)))
+    results['export_filtered'] = measure(_get(client, '/export', q='status:失敗 #smoke'), max(1, min(iterations, 5)))
+
+    partial_ids = rng.sample(case_ids, min(len(case_ids), iterations))
+    for name, endpoint in (('partial_case_details', '/case-details/{}'),
+                           ('partial_status_result', '/display-status-result/{}'),
+                           ('partial_notes', '/display-notes/{}')):
+        ids = iter(partial_ids * 2)
+        results[name] = measure(lambda: _get(client, endpoint.format(next(ids)))(), max(1, len(partial_ids) - 1))
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='執行效能測試並輸出 JSON')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--workbook-cases', type=int, default=500)
+    parser.add_argument('--data-dir', default=os.path.join(BASE_DIR, 'instance', 'benchmarks'))
+    parser.add_argument('--output', help='結果寫入的 JSON 檔案 (預設輸出到 stdout)')
+    parser.add_argument('--single-size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--workbook', help=argparse.SUPPRESS)
+    parser.add_argument('--workbook-cache-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_size:
+        results = run_single_size(args.single_size, args.iterations, args.data_dir, args.workbook,
+                                  args.workbook_cache_dir)
+        # 只輸出一行 JSON，父行程取最後一行解析，避免被其他 print 干擾
+        print(json.dumps(results, ensure_ascii=False))
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    workbook_path = os.path.join(args.data_dir, f'Import_Bench_{args.workbook_cases}.xlsx')
+    if not os.path.exists(workbook_path):
+        generate_workbook(workbook_path, args.workbook_cases, prefix='IMPORT')
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'workbook_cases': args.workbook_cases,
+        },
+        'sizes': {},
+    }
+
+    for size in args.sizes:
+        source_db = os.path.join(args.data_dir, f'bench_{size}.db')
+        if not os.path.exists(source_db):
+            print(f'產生 {size} 筆案例的資料庫...', file=sys.stderr)
+            generate_database(source_db, size)
+
+        with tempfile.TemporaryDirectory(prefix='bench_') as tmp_dir:
+            db_copy = os.path.join(tmp_dir, 'bench.db')
+            rules_copy = os.path.join(tmp_dir, 'category_rules.json')
+            shutil.copyfile(source_db, db_copy)
+            shutil.copyfile(os.path.join(BASE_DIR, 'category_rules.json'), rules_copy)
+            env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_copy}', CATEGORY_RULES_PATH=rules_copy)
+
+            print(f'執行 {size} 筆案例的效能測試...', file=sys.stderr)
+            output = subprocess.check_output(
+                [sys.executable, '-m', 'benchmarks.run', '--single-size', str(size),
+                 '--iterations', str(args.iterations), '--data-dir', args.data_dir,
+                 '--workbook', workbook_path,
+                 '--workbook-cache-dir', os.path.join(tmp_dir, 'workbook_cache')],
+                cwd=BASE_DIR, env=env, text=True
+            )
+            report['sizes'][str(size)] = json.loads(output.strip().splitlines()[-1])
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
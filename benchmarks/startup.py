@@ -0,0 +1,116 @@
+# benchmarks/startup.py
+"""
+量測應用程式啟動時間與每個 worker 的記憶體用量 (僅限 Linux，需讀取 /proc)。
+
+    python -m benchmarks.startup --runs 5 --workers 4
+
+- cold import：全新 Python 行程中 import app 並建立 app 所需的時間與 RSS
+- per-worker RSS：模擬 gunicorn，比較 "各 worker 自行載入" 與 "--preload 後 fork"
+  兩種情況下，每個 worker 處理過一次列表頁後的 RSS / PSS / Private 記憶體
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+from benchmarks.generate import BASE_DIR
+
+COLD_START_SNIPPET = """
+import time, json, resource
+start = time.perf_counter()
+import app as app_module
+application = app_module.create_app() if hasattr(app_module, 'create_app') else app_module.app
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  'pandas_loaded': 'pandas' in __import__('sys').modules}))
+"""
+
+
+def load_application():
+    import app as app_module
+    if hasattr(app_module, 'create_app'):
+        return app_module.create_app()
+    return app_module.app
+
+
+def read_memory_kb():
+    """讀取目前行程的 RSS / PSS / Private 記憶體 (KB)。"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:', 'Private_Clean:', 'Private_Dirty:'):
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss_kb': values.get('Rss', 0),
+        'pss_kb': values.get('Pss', 0),
+        'private_kb': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0),
+    }
+
+
+def run_worker(application, write_fd):
+    client = application.test_client()
+    client.get('/')
+    os.write(write_fd, (json.dumps(read_memory_kb()) + '\n').encode())
+    # 等待父行程收集完所有 worker 的數據，讓共用頁面在量測期間維持共用
+    time.sleep(1.5)
+    os._exit(0)
+
+
+def measure_workers(workers, preload):
+    read_fd, write_fd = os.pipe()
+    application = load_application() if preload else None
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            run_worker(application or load_application(), write_fd)
+        pids.append(pid)
+    os.close(write_fd)
+
+    samples = []
+    with os.fdopen(read_fd) as reader:
+        for line in reader:
+            samples.append(json.loads(line))
+            if len(samples) == workers:
+                break
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    return {key: round(statistics.mean(sample[key] for sample in samples)) for key in samples[0]}
+
+
+def measure_cold_start(runs):
+    results = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', COLD_START_SNIPPET], cwd=BASE_DIR, text=True)
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'runs': runs,
+        'median_seconds': round(statistics.median(r['seconds'] for r in results), 4),
+        'median_maxrss_kb': statistics.median(r['maxrss_kb'] for r in results),
+        'pandas_loaded_at_startup': results[0]['pandas_loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='量測啟動時間與 worker 記憶體')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    report = {
+        'cold_start': measure_cold_start(args.runs),
+        'per_worker_no_preload': measure_workers(args.workers, preload=False),
+        'per_worker_preload': measure_workers(args.workers, preload=True),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+# build_assets.py
+"""
+建置靜態資源：依內容雜湊重新命名、預先壓縮，並寫出 manifest.json (見 assets.py)。
+
+    python build_assets.py --vendor    # 下載 assets.VENDOR_ASSETS 中尚未存在的第三方套件到 static/vendor/
+    python build_assets.py --vendor --force  # 更新 VENDOR_ASSETS 的版本後重新下載
+    python build_assets.py             # 建置到 static/dist/
+    python build_assets.py --clean     # 同時刪除不在新 manifest 中的舊檔
+
+第三方套件已提交在 static/vendor/；只有更新版本時才需要能連到 CDN 的環境，內網環境只需要建置。
+部署時 (程式或 static/ 有變動後) 執行一次建置即可。舊的雜湊檔預設保留，
+讓仍在使用舊頁面的瀏覽器不會拿到 404。
+"""
+import os
+import re
+import gzip
+import json
+import hashlib
+import sys
+import argparse
+import posixpath
+import urllib.request
+
+from assets import STATIC_DIR, DIST_DIR, MANIFEST_NAME, VENDOR_ASSETS, missing_vendor_assets
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# 已壓縮過的格式 (woff2、圖片等) 不再產生預壓縮檔
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.map', '.txt', '.html', '.ttf', '.eot', '.woff'}
+HASH_LENGTH = 12
+
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def download_vendor_assets(force=False):
+    for path, url in VENDOR_ASSETS.items():
+        target = os.path.join(STATIC_DIR, path)
+        if os.path.exists(target) and not force:
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            content = response.read()
+        with open(target, 'wb') as f:
+            f.write(content)
+        print(f"已下載 {url} -> static/{path} ({len(content)} bytes)")
+
+
+def _source_files():
+    """回傳 static/ 下 (dist 以外) 的相對路徑，CSS 排在最後，以便改寫其中的 url()。"""
+    paths = []
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if os.path.abspath(root) == os.path.abspath(STATIC_DIR) and 'dist' in dirs:
+            dirs.remove('dist')
+        for name in files:
+            paths.append(os.path.relpath(os.path.join(root, name), STATIC_DIR).replace(os.sep, '/'))
+    return sorted(paths, key=lambda path: (path.endswith('.css'), path))
+
+
+def _rewrite_css_urls(path, text, manifest):
+    """CSS 中以相對路徑引用的檔案 (例如字型) 改為引用雜湊後的檔名。"""
+    base = posixpath.dirname(path)
+
+    def replace(match):
+        url = match.group(2).strip()
+        if url.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        target, _, fragment = url.partition('#')
+        target = target.split('?', 1)[0]
+        hashed = manifest.get(posixpath.normpath(posixpath.join(base, target)))
+        if not hashed:
+            return match.group(0)
+        # 雜湊檔與原始檔位於相同的子目錄，相對路徑的結構不變
+        new_url = posixpath.relpath(hashed, base)
+        return f'url("{new_url}{"#" + fragment if fragment else ""}")'
+
+    return _CSS_URL.sub(replace, text)
+
+
+def _hashed_name(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, ext = posixpath.splitext(path)
+    return f'{stem}.{digest}{ext}'
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _write_compressed(path, content):
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if HAS_BROTLI:
+        variants.append(('.br', brotli.compress(content, quality=11)))
+    for suffix, compressed in variants:
+        # 壓縮效果不明顯時不產生，直接送原始檔
+        if len(compressed) < len(content) * 0.9:
+            _write(path + suffix, compressed)
+
+
+def build(clean=False):
+    """建置所有靜態資源，回傳 manifest ({原始路徑: 雜湊路徑})。"""
+    manifest = {}
+    for path in _source_files():
+        with open(os.path.join(STATIC_DIR, path), 'rb') as f:
+            content = f.read()
+        if path.endswith('.css'):
+            content = _rewrite_css_urls(path, content.decode('utf-8'), manifest).encode('utf-8')
+
+        hashed = _hashed_name(path, content)
+        target = os.path.join(DIST_DIR, hashed)
+        if not os.path.exists(target):
+            _write(target, content)
+            if posixpath.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                _write_compressed(target, content)
+        manifest[path] = hashed
+
+    # manifest 最後才寫入，執行中的服務不會讀到還沒產生完的檔案
+    _write(os.path.join(DIST_DIR, MANIFEST_NAME),
+           json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8'))
+
+    if clean:
+        keep = {os.path.join(DIST_DIR, MANIFEST_NAME)}
+        for hashed in manifest.values():
+            target = os.path.join(DIST_DIR, hashed)
+            keep.update({target, target + '.gz', target + '.br'})
+        for root, dirs, files in os.walk(DIST_DIR):
+            for name in files:
+                full_path = os.path.join(root, name)
+                if full_path not in keep:
+                    os.remove(full_path)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='建置靜態資源 (雜湊檔名與預壓縮)')
+    parser.add_argument('--vendor', action='store_true', help='下載尚未存在的第三方套件後結束')
+    parser.add_argument('--force', action='store_true', help='搭配 --vendor，重新下載所有第三方套件')
+    parser.add_argument('--clean', action='store_true', help='刪除不在新 manifest 中的舊檔')
+    args = parser.parse_args()
+
+    if args.vendor:
+        download_vendor_assets(force=args.force)
+        return
+
+    missing = missing_vendor_assets()
+    if missing:
+        print(f"錯誤：static/vendor/ 缺少 {len(missing)} 個第三方套件，請先執行 --vendor 下載：")
+        for path in missing:
+            print(f"  {path}")
+        sys.exit(1)
+    manifest = build(clean=args.clean)
+    if not HAS_BROTLI:
+        print("未安裝 brotli，只產生 gzip 預壓縮檔。")
+    print(f"已建置 {len(manifest)} 個靜態資源到 {os.path.relpath(DIST_DIR)}。")
+
+
+if __name__ == '__main__':
+    main()
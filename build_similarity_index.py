@@ -0,0 +1,19 @@
+# build_similarity_index.py
+from app import create_app
+from extensions import db
+from similarity import rebuild_index
+from db_concurrency import serialized_write
+
+def run_build():
+    """
+    重建所有測試案例的相似案例索引 (MinHash 簽章與 LSH 分桶)。
+    升級資料庫後或調整相似度參數後執行一次即可，之後新增、編輯與匯入會自動維護。
+    """
+    app = create_app()
+    with app.app_context(), serialized_write():
+        total = rebuild_index()
+        db.session.commit()
+        print(f"相似案例索引重建完成，共處理 {total} 筆案例。")
+
+if __name__ == '__main__':
+    run_build()
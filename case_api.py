@@ -0,0 +1,82 @@
+# case_api.py
+"""
+唯讀的案例 JSON API (/api/cases)。
+
+篩選條件與列表頁相同 (product、main_category、sub_category 與 q 智慧搜尋語法)。
+fields= 指定要輸出的欄位，只會 SELECT 這些欄位；tags 取自 tag_names。
+結果依 id 排序，以 keyset 方式分頁：回應中的 next_cursor 帶入下一次的 cursor=，
+不論資料量多大，每頁的查詢成本都相同，也不會因為分頁期間新增案例而重複或遺漏。
+
+format=ndjson 時從 cursor 之後一路串流到最後一筆 (每行一個 JSON 物件)，
+以 yield_per 分批讀取，伺服器端的記憶體用量與資料量無關。
+"""
+import json
+from sqlalchemy import select
+
+from extensions import db
+from models import TestCase
+from case_filters import apply_case_filters
+
+API_FIELDS = ('id', 'case_id', 'product_type', 'category', 'main_category', 'sub_category', 'test_item',
+              'test_purpose', 'preconditions', 'test_steps', 'expected_result', 'actual_result', 'status',
+              'notes', 'reference', 'version', 'tags')
+DEFAULT_FIELDS = ('id', 'case_id', 'product_type', 'main_category', 'sub_category', 'test_item', 'status',
+                  'tags', 'version')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 1000
+
+
+def parse_fields(value):
+    """解析 fields= (以逗號分隔)，未指定時使用 DEFAULT_FIELDS；有不支援的欄位時拋出 ValueError。"""
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in API_FIELDS]
+    if unknown:
+        raise ValueError(f"不支援的欄位：{', '.join(unknown)}")
+    return fields or DEFAULT_FIELDS
+
+
+def parse_cursor(value):
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValueError('cursor 格式錯誤。')
+    return int(value)
+
+
+def _statement(fields, filters, cursor):
+    # id 一定要查詢，作為 keyset 分頁的依據
+    columns = [TestCase.id] + [TestCase.tag_names if name == 'tags' else getattr(TestCase, name)
+                               for name in fields if name != 'id']
+    statement = apply_case_filters(select(*columns), filters).order_by(TestCase.id)
+    if cursor is not None:
+        statement = statement.where(TestCase.id > cursor)
+    return statement
+
+
+def _to_item(row, fields):
+    values = dict(zip(['id'] + [name for name in fields if name != 'id'], row))
+    item = {}
+    for name in fields:
+        value = values[name]
+        if name == 'tags':
+            value = value.split(',') if value else []
+        item[name] = value
+    return item
+
+
+def fetch_page(filters, fields, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """回傳 (items, next_cursor)；沒有下一頁時 next_cursor 為 None。"""
+    rows = db.session.execute(_statement(fields, filters, cursor).limit(limit + 1)).all()
+    next_cursor = str(rows[limit - 1].id) if len(rows) > limit else None
+    return [_to_item(row, fields) for row in rows[:limit]], next_cursor
+
+
+def stream_ndjson(filters, fields, cursor=None, chunk_size=STREAM_CHUNK_SIZE):
+    """逐批產生 NDJSON 文字，每批包含最多 chunk_size 行。"""
+    result = db.session.execute(_statement(fields, filters, cursor).execution_options(yield_per=chunk_size))
+    for rows in result.partitions():
+        yield ''.join(json.dumps(_to_item(row, fields), ensure_ascii=False, separators=(',', ':')) + '\n'
+                      for row in rows)
@@ -0,0 +1,76 @@
+# case_filters.py
+"""
+列表頁、匯出與快照共用的篩選條件。
+
+智慧搜尋字串的語法：
+- status:通過        依狀態篩選
+- #regression / tag:regression   依標籤篩選 (多個標籤需同時符合)
+- 其他字詞          比對 Case ID 或測試項目
+- 以雙引號包住的字詞視為一個整體
+"""
+import re
+from collections import namedtuple
+from sqlalchemy import or_, func, literal
+
+from models import TestCase
+
+CaseFilters = namedtuple('CaseFilters', ['product', 'main_category', 'sub_category', 'query_string',
+                                         'search_terms', 'statuses', 'tags'])
+
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def parse_search_query(query_string):
+    """回傳 (關鍵字, 狀態, 標籤) 三個串列。"""
+    search_terms = []
+    statuses = []
+    tags = []
+    for quoted, bare in _QUERY_PART.findall(query_string or ''):
+        part = quoted or bare
+        if part.startswith('status:'):
+            status = part.split(':', 1)[1]
+            if status:
+                statuses.append(status)
+        elif part.startswith(('tag:', '#')):
+            tag = part.split(':', 1)[-1].lstrip('#')
+            if tag:
+                tags.append(tag)
+        elif part:
+            search_terms.append(part)
+    return search_terms, statuses, tags
+
+
+def filters_from_args(args):
+    """由 request.args (或任何 dict) 取得篩選條件。"""
+    query_string = (args.get('q') or '').strip()
+    search_terms, statuses, tags = parse_search_query(query_string)
+    return CaseFilters(
+        product=args.get('product') or None,
+        main_category=args.get('main_category') or None,
+        sub_category=args.get('sub_category') or None,
+        query_string=query_string,
+        search_terms=search_terms,
+        statuses=statuses,
+        tags=tags,
+    )
+
+
+def apply_case_filters(query, filters):
+    """將篩選條件套用到 TestCase 的 Query 或 select()。"""
+    if filters.product:
+        query = query.filter(TestCase.product_type == filters.product)
+    if filters.main_category:
+        query = query.filter(TestCase.main_category == filters.main_category)
+    if filters.sub_category:
+        query = query.filter(TestCase.sub_category == filters.sub_category)
+    if filters.statuses:
+        query = query.filter(TestCase.status.in_(filters.statuses))
+    # 以 tag_names 比對完整的標籤名稱 (前後補上逗號)，不需要對每個標籤做 EXISTS 子查詢
+    for tag_name in filters.tags:
+        query = query.filter(func.instr(literal(',') + TestCase.tag_names + ',', f',{tag_name},') > 0)
+    for term in filters.search_terms:
+        query = query.filter(or_(
+            TestCase.case_id.ilike(f'%{term}%'),
+            TestCase.test_item.ilike(f'%{term}%')
+        ))
+    return query
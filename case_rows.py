@@ -0,0 +1,42 @@
+# case_rows.py
+"""
+列表頁使用的輕量資料列。
+
+列表只顯示 Case ID、標籤、測試項目、狀態/實際結果與備註；測試目的、前置條件、
+步驟與預期結果這些長文字要展開後才由 /case-details 載入。這裡只查詢列表需要的
+欄位並轉成 namedtuple，不建立 TestCase 物件；附件每頁以一次查詢取得。
+
+標籤取自 TestCase.tag_names，不需要 join test_case_tags。
+CaseRow 的欄位名稱與 TestCase 相同，列表的 partials 可以同時用於兩者。
+"""
+from collections import namedtuple
+
+from extensions import db
+from models import TestCase, Attachment
+from case_filters import apply_case_filters
+
+LIST_COLUMNS = ('id', 'case_id', 'test_item', 'status', 'actual_result', 'notes', 'version', 'tag_names')
+
+CaseRow = namedtuple('CaseRow', LIST_COLUMNS[:-1] + ('tags', 'has_attachments'))
+TagRef = namedtuple('TagRef', ['name'])
+
+
+def paginate_case_rows(filters, page, per_page):
+    """依篩選條件分頁，回傳 Pagination，items 為 CaseRow。"""
+    query = db.session.query(*[getattr(TestCase, name) for name in LIST_COLUMNS])
+    pagination = (apply_case_filters(query, filters)
+                  .order_by(TestCase.case_id)
+                  .paginate(page=page, per_page=per_page, error_out=False))
+
+    ids = [row.id for row in pagination.items]
+    with_attachments = set()
+    if ids:
+        with_attachments = {case_id for case_id, in (db.session.query(Attachment.test_case_id)
+                                                     .filter(Attachment.test_case_id.in_(ids))
+                                                     .distinct())}
+
+    pagination.items = [CaseRow(*row[:-1],
+                                tags=tuple(TagRef(name) for name in row.tag_names.split(',') if name),
+                                has_attachments=row.id in with_attachments)
+                        for row in pagination.items]
+    return pagination
@@ -0,0 +1,111 @@
+# db_concurrency.py
+"""
+多個 gunicorn worker 共用同一個 SQLite 檔案時的併發設定：
+連線時啟用 WAL 與相關 PRAGMA、遇到暫時性的鎖定錯誤時自動重試，
+以及讓匯入、重新分類等長時間寫入依序排隊執行。
+"""
+import os
+import time
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from extensions import db
+
+try:
+    import fcntl
+except ImportError:  # Windows 開發環境沒有 fcntl，退回單一行程內的鎖
+    fcntl = None
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 15000,        # 毫秒
+    'cache_size': -32000,         # 負數代表 KiB，約 32MB
+    'mmap_size': 134217728,       # 128MB
+    'temp_store': 'MEMORY',
+    # SQLite 預設不檢查外鍵：CaseSignature/CaseLshBucket 的 ondelete='CASCADE'
+    # 依賴這個設定，刪除案例時才會一併刪除相似度索引。
+    # migrations/env.py 在遷移期間會關閉它，避免 batch 重建資料表時觸發外鍵。
+    'foreign_keys': 'ON',
+}
+
+LOCK_ERROR_MESSAGES = ('database is locked', 'database is busy', 'database table is locked')
+
+_local_write_lock = threading.Lock()
+
+
+def init_sqlite_concurrency(app):
+    """在 app 的 SQLite engine 上註冊 connect 事件，套用 SQLITE_PRAGMAS 設定。"""
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS)
+    pragmas.update(app.config.get('SQLITE_PRAGMAS', {}))
+    app.config['SQLITE_PRAGMAS'] = pragmas
+    app.config.setdefault('DB_RETRY_ATTEMPTS', 5)
+    app.config.setdefault('DB_RETRY_BASE_DELAY', 0.05)
+    app.config.setdefault('DB_WRITE_LOCK_PATH', os.path.join(app.instance_path, 'db-write.lock'))
+
+    with app.app_context():
+        @event.listens_for(db.engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            if not isinstance(dbapi_connection, sqlite3.Connection):
+                return
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+            cursor.close()
+
+
+def is_lock_error(error):
+    message = str(getattr(error, 'orig', error)).lower()
+    return any(text in message for text in LOCK_ERROR_MESSAGES)
+
+
+def retry_on_locked(func):
+    """
+    遇到 "database is locked" 之類的暫時性錯誤時，rollback 後以指數退避重試整個函式。
+    只適合套用在重跑也不會產生副作用的寫入流程 (例如不會重複存檔)。
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        from flask import current_app
+        attempts = current_app.config.get('DB_RETRY_ATTEMPTS', 5)
+        base_delay = current_app.config.get('DB_RETRY_BASE_DELAY', 0.05)
+        for attempt in range(attempts):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                db.session.rollback()
+                if not is_lock_error(e) or attempt == attempts - 1:
+                    raise
+                delay = base_delay * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+    return wrapper
+
+
+@contextmanager
+def serialized_write():
+    """
+    讓長時間的寫入 (匯入 Excel、重新分類) 跨 worker 依序執行。
+    以 instance 目錄下的檔案鎖當作寫入佇列，後到的請求會在這裡等待。
+    """
+    from flask import current_app
+    lock_path = current_app.config.get('DB_WRITE_LOCK_PATH')
+    if fcntl is None or not lock_path:
+        with _local_write_lock:
+            yield
+        return
+
+    with _local_write_lock, open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
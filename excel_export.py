@@ -0,0 +1,154 @@
+# excel_export.py
+"""
+Excel 匯出：案例轉成匯出欄位、產生 xlsx，以及依子分類平行產生多個活頁簿並串流成 ZIP。
+
+render_workbook 只接收純資料 (dict 串列)，可以在 ProcessPoolExecutor 的子行程中執行；
+子行程以 spawn 建立，只會 import 這個模組與 pandas，不會載入 Flask 應用程式。
+"""
+import io
+import os
+import re
+import zipfile
+import posixpath
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+_pool = None
+_pool_lock = threading.Lock()
+_UNSAFE_FILENAME = re.compile(r'[\\/:*?"<>|]+')
+
+
+def case_export_record(case):
+    return {
+        'Case ID': case.case_id,
+        '產品類型': case.product_type,
+        '主分類': case.main_category.replace('功能', '') if case.main_category else '',
+        '子分類': case.sub_category,
+        '測試項目': case.test_item,
+        '測試目的': case.test_purpose,
+        '前置條件': case.preconditions,
+        '測試步驟': case.test_steps,
+        '預期結果': case.expected_result,
+        '實際結果': case.actual_result,
+        '狀態': case.status,
+        '標籤': ", ".join(case.tag_name_list),
+        '備註': case.notes
+    }
+
+
+def render_workbook(records, sheet_name='TestCases'):
+    """將匯出資料寫成 xlsx，回傳檔案內容 (bytes)。"""
+    # pandas 只有匯入/匯出會用到，延遲到這裡才載入以加快 worker 啟動
+    import pandas as pd
+
+    output = io.BytesIO()
+    df = pd.DataFrame(records)
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+        worksheet = writer.sheets[sheet_name]
+        for i, col in enumerate(df.columns):
+            column_len = max(df[col].astype(str).map(len).max(), len(col)) + 2
+            worksheet.set_column(i, i, column_len)
+    return output.getvalue()
+
+
+def safe_filename(name):
+    return _UNSAFE_FILENAME.sub('_', name).strip() or '未分類'
+
+
+def unique_member_name(name, used):
+    """
+    不同分類經 safe_filename (與去掉「功能」) 後可能同名，ZIP 中的同名檔案解壓時會互相覆蓋，
+    因此已使用過的名稱 (不分大小寫) 加上序號。used 為已使用名稱的集合，會被更新。
+    """
+    stem, ext = posixpath.splitext(name)
+    candidate = name
+    number = 2
+    while candidate.lower() in used:
+        candidate = f'{stem} ({number}){ext}'
+        number += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def get_export_pool(max_workers):
+    """每個 worker 行程共用一個行程池，第一次使用時才建立。"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _discard_pool(pool):
+    """子行程異常結束 (例如被 OOM killer 終止) 後行程池無法再使用，關閉後讓下次重新建立。"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_in_pool(groups, max_workers):
+    """在行程池中產生活頁簿，依完成順序產出 (檔名, 內容)；行程池損壞時重建並重試一次尚未完成的部分。"""
+    pending = dict(groups)
+    for attempt in range(2):
+        pool = get_export_pool(max_workers)
+        try:
+            futures = {pool.submit(render_workbook, records): name for name, records in pending.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                content = future.result()
+                del pending[name]
+                yield name, content
+            return
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            if attempt == 1:
+                raise
+
+
+class _ZipStream(io.RawIOBase):
+    """不可 seek 的寫入目標，zipfile 寫入的內容暫存在這裡，由 drain() 取出後送給用戶端。"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_workbooks_zip(groups, max_workers, parallel_min_rows=2000):
+    """
+    groups 為 {ZIP 內的檔名: 匯出資料}。每個活頁簿在行程池中各自產生，
+    完成一個就寫入 ZIP 並送出，總耗時約等於最大的那個子分類。
+    行程數為 1 或資料量不大時直接在目前行程中產生，省下行程間傳輸的成本。
+    """
+    stream = _ZipStream()
+    # xlsx 本身已壓縮，ZIP 只需存放
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        total_rows = sum(len(records) for records in groups.values())
+        if max_workers > 1 and len(groups) > 1 and total_rows >= parallel_min_rows:
+            completed = _render_in_pool(groups, max_workers)
+        else:
+            completed = ((name, render_workbook(records)) for name, records in groups.items())
+
+        for name, content in completed:
+            archive.writestr(name, content)
+            yield stream.drain()
+    yield stream.drain()
+
+
+def default_export_processes():
+    return min(4, os.cpu_count() or 1)
@@ -1,13 +1,18 @@
 # fix_categories.py
 import json
-from app import app, db, TestCase, categorize_case
+from app import create_app
+from extensions import db
+from models import TestCase
+from utils import categorize_case, case_data_from_case
+from db_concurrency import serialized_write
 
 def run_fix():
     """
     重新執行所有測試案例的分類邏輯，並更新資料庫。
     """
     # 確保在 Flask 應用程式的上下文中執行
-    with app.app_context():
+    app = create_app()
+    with app.app_context(), serialized_write():
         all_cases = TestCase.query.all()
         
         if not all_cases:
@@ -19,11 +24,7 @@ def run_fix():
         updated_count = 0
         for case in all_cases:
             # 建立一個模擬的 case_data 字典給 categorize_case 函式使用
-            case_data = {
-                '測試項目': case.test_item,
-                '測試步驟': case.test_steps,
-                'category': case.category  # 使用原始的 Excel 工作表名稱
-            }
+            case_data = case_data_from_case(case)
             
             # 使用修正後的邏輯重新獲取分類
             new_main_cat, new_sub_cat = categorize_case(case_data, case.product_type)
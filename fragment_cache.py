@@ -0,0 +1,90 @@
+# fragment_cache.py
+import sys
+import threading
+from collections import OrderedDict
+from markupsafe import Markup, escape
+
+
+class FragmentCache:
+    """
+    以記憶體用量為上限的 LRU 快取，用來存放已渲染好的 HTML 片段。
+    Key 由呼叫端決定 (通常包含 case id 與 version)，因此案例被修改後
+    舊的片段不需要主動清除，會自然被 LRU 淘汰。
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_bytes = app.config.setdefault('FRAGMENT_CACHE_MAX_BYTES', self.max_bytes)
+        app.extensions['fragment_cache'] = self
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._current_bytes -= sys.getsizeof(old)
+            self._entries[key] = value
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= sys.getsizeof(evicted)
+
+    def get_or_render(self, key, render):
+        value = self.get(key)
+        if value is None:
+            value = Markup(render())
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    @property
+    def current_bytes(self):
+        return self._current_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+fragment_cache = FragmentCache()
+
+
+def render_manual_list(text_block):
+    """將多行文字轉為編號清單 HTML，每一行內容都會經過 escape() 跳脫。"""
+    lines = [line.strip().lstrip('0123456789. ') for line in (text_block or "").split('\n') if line.strip()]
+    parts = ['<div class="manual-list">']
+    for i, line in enumerate(lines, start=1):
+        parts.append(
+            f'<div class="manual-list-item"><span class="manual-list-number">{i}.</span>'
+            f'<span class="manual-list-text">{escape(line)}</span></div>'
+        )
+    parts.append('</div>')
+    return Markup(''.join(parts))
+
+
+def render_case_field_list(case, field):
+    """以 (case id, version, 欄位) 為 key 快取 render_manual_list 的結果。"""
+    key = ('manual_list', case.id, case.version, field)
+    return fragment_cache.get_or_render(key, lambda: render_manual_list(getattr(case, field)))
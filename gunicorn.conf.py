@@ -0,0 +1,25 @@
+# gunicorn.conf.py
+"""
+gunicorn 設定：以 --preload 模式在 master 行程建立 app 後再 fork 出 worker，
+讓所有 worker 以 copy-on-write 共用已載入的程式碼頁面。
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+preload_app = True
+
+
+def on_starting(server):
+    # app 本身延遲載入 pandas；在 preload 模式下先於 master 載入，
+    # 之後 fork 的 worker 就能共用這些頁面，第一次匯入/匯出時也不必再付出 import 成本
+    if os.environ.get('PRELOAD_HEAVY_MODULES', '1') == '1':
+        import pandas  # noqa: F401
+
+
+def post_fork(server, worker):
+    # master 建立的連線池不能跨 fork 共用，讓每個 worker 建立自己的連線
+    from extensions import db
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,233 @@
+# instrumentation.py
+"""
+每個請求的效能紀錄：總耗時、SQL 次數與耗時、模板渲染耗時、Excel 解析/產生耗時。
+結果會寫入 Server-Timing 標頭，並累積在記憶體中的直方圖，由 /metrics 以
+Prometheus 文字格式輸出。超過門檻的慢請求會連同其 SQL 一起寫入 log。
+
+注意：資料存在各個 worker 行程的記憶體內，多 worker 部署時 /metrics 只代表
+回應該次抓取的那個 worker。
+"""
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request, Response, before_render_template, template_rendered
+from sqlalchemy import event
+
+from extensions import db
+
+slow_request_logger = logging.getLogger('testcase.slow_requests')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_CAPTURED_STATEMENTS = 50
+
+
+class RequestHistogram:
+    """
+    以 endpoint 為單位的請求耗時統計。
+    累積型的 bucket/sum/count 供 Prometheus 計算速率，
+    另外保留最近 window 秒的樣本以提供 p50/p95。
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window_seconds=300, max_samples=10000):
+        self.buckets = tuple(buckets)
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._bucket_counts = defaultdict(lambda: [0] * len(self.buckets))
+        self._sum = defaultdict(float)
+        self._count = defaultdict(int)
+        self._sql_count = defaultdict(int)
+        self._sql_seconds = defaultdict(float)
+        self._recent = deque(maxlen=max_samples)
+
+    def observe(self, endpoint, seconds, sql_count=0, sql_seconds=0.0):
+        now = time.monotonic()
+        with self._lock:
+            counts = self._bucket_counts[endpoint]
+            for i, upper in enumerate(self.buckets):
+                if seconds <= upper:
+                    counts[i] += 1
+            self._sum[endpoint] += seconds
+            self._count[endpoint] += 1
+            self._sql_count[endpoint] += sql_count
+            self._sql_seconds[endpoint] += sql_seconds
+            self._recent.append((now, endpoint, seconds))
+
+    def recent_quantiles(self, quantiles=(0.5, 0.95)):
+        cutoff = time.monotonic() - self.window_seconds
+        samples = defaultdict(list)
+        with self._lock:
+            for ts, endpoint, seconds in self._recent:
+                if ts >= cutoff:
+                    samples[endpoint].append(seconds)
+        result = {}
+        for endpoint, values in samples.items():
+            values.sort()
+            result[endpoint] = {
+                q: values[min(len(values) - 1, int(q * len(values)))] for q in quantiles
+            }
+        return result
+
+    def render_prometheus(self):
+        lines = [
+            '# HELP testcase_request_duration_seconds Request duration per endpoint.',
+            '# TYPE testcase_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            endpoints = sorted(self._count)
+            for endpoint in endpoints:
+                label = _escape_label(endpoint)
+                for upper, count in zip(self.buckets, self._bucket_counts[endpoint]):
+                    lines.append(f'testcase_request_duration_seconds_bucket{{endpoint="{label}",le="{upper}"}} {count}')
+                lines.append(f'testcase_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {self._count[endpoint]}')
+                lines.append(f'testcase_request_duration_seconds_sum{{endpoint="{label}"}} {self._sum[endpoint]:.6f}')
+                lines.append(f'testcase_request_duration_seconds_count{{endpoint="{label}"}} {self._count[endpoint]}')
+
+            lines.append('# HELP testcase_sql_statements_total SQL statements executed per endpoint.')
+            lines.append('# TYPE testcase_sql_statements_total counter')
+            for endpoint in endpoints:
+                lines.append(f'testcase_sql_statements_total{{endpoint="{_escape_label(endpoint)}"}} {self._sql_count[endpoint]}')
+            lines.append('# HELP testcase_sql_seconds_total Time spent in SQL per endpoint.')
+            lines.append('# TYPE testcase_sql_seconds_total counter')
+            for endpoint in endpoints:
+                lines.append(f'testcase_sql_seconds_total{{endpoint="{_escape_label(endpoint)}"}} {self._sql_seconds[endpoint]:.6f}')
+
+        lines.append(f'# HELP testcase_request_duration_recent_seconds Request duration quantiles over the last {self.window_seconds}s.')
+        lines.append('# TYPE testcase_request_duration_recent_seconds gauge')
+        for endpoint, values in sorted(self.recent_quantiles().items()):
+            for q, seconds in values.items():
+                lines.append(f'testcase_request_duration_recent_seconds{{endpoint="{_escape_label(endpoint)}",quantile="{q}"}} {seconds:.6f}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_histogram = RequestHistogram()
+
+
+def _current_timing():
+    if has_request_context():
+        return g.get('_timing')
+    return None
+
+
+@contextmanager
+def timed_section(name):
+    """量測一段程式碼的耗時並累加到目前請求的 Server-Timing 項目 (例如 'excel')。"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = _current_timing()
+        if timing is not None:
+            timing['sections'][name] = timing['sections'].get(name, 0.0) + time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 開始時間記在這次執行的 context 上：敘述失敗時 after_cursor_execute 不會執行，
+    # 記在連線上的話會一直留在連線池的連線裡，之後的耗時也會對錯開始時間
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_start', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    timing = _current_timing()
+    if timing is None:
+        return
+    timing['sql_count'] += 1
+    timing['sql_time'] += elapsed
+    if len(timing['statements']) < MAX_CAPTURED_STATEMENTS:
+        timing['statements'].append((elapsed, statement))
+
+
+def _before_render(sender, template, context, **extra):
+    timing = _current_timing()
+    if timing is None:
+        return
+    # 模板中可能再呼叫 render_template (例如快取的列表列)，只計算最外層
+    if timing['template_depth'] == 0:
+        timing['template_start'] = time.perf_counter()
+    timing['template_depth'] += 1
+
+
+def _after_render(sender, template, context, **extra):
+    timing = _current_timing()
+    if timing is None or timing['template_depth'] == 0:
+        return
+    timing['template_depth'] -= 1
+    if timing['template_depth'] == 0:
+        timing['template_time'] += time.perf_counter() - timing['template_start']
+
+
+def init_instrumentation(app):
+    app.config.setdefault('METRICS_ENABLED', True)
+    app.config.setdefault('SLOW_REQUEST_THRESHOLD_MS', 500)
+    app.config.setdefault('METRICS_WINDOW_SECONDS', 300)
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    request_histogram.window_seconds = app.config['METRICS_WINDOW_SECONDS']
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_request_timer():
+        g._timing = {
+            'start': time.perf_counter(),
+            'sql_count': 0,
+            'sql_time': 0.0,
+            'statements': [],
+            'template_time': 0.0,
+            'template_depth': 0,
+            'template_start': 0.0,
+            'sections': {},
+        }
+
+    @app.after_request
+    def record_request_timing(response):
+        timing = g.pop('_timing', None)
+        if timing is None:
+            return response
+
+        total = time.perf_counter() - timing['start']
+        endpoint = request.endpoint or 'unknown'
+
+        server_timing = [
+            f'app;dur={total * 1000:.1f}',
+            f'db;dur={timing["sql_time"] * 1000:.1f};desc="{timing["sql_count"]} queries"',
+            f'tpl;dur={timing["template_time"] * 1000:.1f}',
+        ]
+        for name, seconds in timing['sections'].items():
+            server_timing.append(f'{name};dur={seconds * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(server_timing)
+
+        if endpoint != 'metrics':
+            request_histogram.observe(endpoint, total, timing['sql_count'], timing['sql_time'])
+
+        if total * 1000 >= app.config['SLOW_REQUEST_THRESHOLD_MS']:
+            slowest = sorted(timing['statements'], key=lambda item: item[0], reverse=True)[:10]
+            sql_report = '\n'.join(f'  {elapsed * 1000:.1f}ms  {statement}' for elapsed, statement in slowest)
+            slow_request_logger.warning(
+                '慢請求 %s %s 耗時 %.1fms (SQL %d 次, %.1fms; 模板 %.1fms)\n%s',
+                request.method, request.full_path, total * 1000,
+                timing['sql_count'], timing['sql_time'] * 1000,
+                timing['template_time'] * 1000, sql_report
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(request_histogram.render_prometheus(),
+                        mimetype='text/plain; version=0.0.4; charset=utf-8')
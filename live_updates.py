@@ -0,0 +1,179 @@
+# live_updates.py
+"""
+案例變更的即時更新。
+
+ORM flush 時收集 TestCase 的狀態/主分類變動 (包含新增與刪除)，commit 前在同一個交易中
+寫入一筆 case_change 紀錄：commit 後所有 worker 都讀得到，rollback 時一起消失。
+case_change.id 是遞增的序號 (SQLite 同一時間只有一個寫入交易，序號順序即 commit 順序)。
+
+儀表板與列表頁每隔 LIVE_UPDATES_POLL_SECONDS 秒以 /events?after=<序號> 取得之後的變動，
+一次輪詢只是一個主鍵範圍查詢，不會像長連線一樣佔住 worker 執行緒。
+(不採用行程內 pub/sub + SSE 推播：gunicorn 有多個 worker，行程內的通知只送得到
+同一個 worker 的連線；每個 SSE 連線也會一直佔住一個 worker 執行緒。)
+case_change 只保留最近 LIVE_UPDATES_RETENTION 筆；頁面手上的序號已早於保留範圍時
+回應 resync，由頁面向資料庫重新讀取目前的數字 (而不是重新載入整頁)。
+"""
+import json
+from datetime import datetime
+from sqlalchemy import event, inspect, insert, delete, func, case
+
+from extensions import db
+from models import TestCase, CaseChange
+
+# 每寫入這麼多筆變動清除一次超出保留範圍的舊紀錄
+PRUNE_EVERY = 100
+# 一次交易變動的案例超過這個數量 (例如匯入) 時只記錄一筆 resync，不逐筆記錄
+MAX_CHANGES_PER_RECORD = 1000
+
+
+class ChangeFeed:
+
+    def __init__(self, retention=1000, batch_size=500):
+        self.retention = retention
+        self.batch_size = batch_size
+
+    def init_app(self, app):
+        app.config.setdefault('LIVE_UPDATES_POLL_SECONDS', 5)
+        self.retention = app.config.setdefault('LIVE_UPDATES_RETENTION', self.retention)
+        self.batch_size = app.config.setdefault('LIVE_UPDATES_BATCH_SIZE', self.batch_size)
+        app.extensions['change_feed'] = self
+
+    def current_cursor(self):
+        return db.session.query(func.coalesce(func.max(CaseChange.id), 0)).scalar()
+
+    def changes_since(self, cursor):
+        """
+        回傳 (changes, cursor, more, resync)。changes 為 cursor 之後的變動 (依序攤平)，
+        more 表示還有下一批；cursor 之後的紀錄已被清除時 resync 為 True，changes 為空。
+        """
+        rows = (db.session.query(CaseChange.id, CaseChange.payload)
+                .filter(CaseChange.id > cursor)
+                .order_by(CaseChange.id)
+                .limit(self.batch_size + 1)
+                .all())
+        if not rows:
+            latest = self.current_cursor()
+            # 序號比資料庫還新 (例如資料庫被換掉)：從目前的序號重新開始
+            return [], latest, False, cursor > latest
+        if rows[0].id > cursor + 1:
+            oldest = db.session.query(func.min(CaseChange.id)).scalar()
+            if oldest is not None and oldest > cursor + 1:
+                return [], self.current_cursor(), False, True
+
+        more = len(rows) > self.batch_size
+        rows = rows[:self.batch_size]
+        changes = []
+        for row in rows:
+            payload = json.loads(row.payload)
+            if payload is None:
+                return [], self.current_cursor(), False, True
+            changes.extend(payload)
+        return changes, rows[-1].id, more, False
+
+    def record(self, connection, changes):
+        """
+        在目前的交易中寫入一筆變動紀錄，並定期清除超出保留範圍的舊紀錄。
+        changes 為 None (或超過 MAX_CHANGES_PER_RECORD 筆) 時只記錄 resync。
+        """
+        if changes is not None and len(changes) > MAX_CHANGES_PER_RECORD:
+            changes = None
+        result = connection.execute(insert(CaseChange.__table__).values(
+            created_on=datetime.utcnow(),
+            payload=json.dumps(changes, ensure_ascii=False, separators=(',', ':'))))
+        change_id = result.inserted_primary_key[0]
+        if change_id % PRUNE_EVERY == 0:
+            connection.execute(delete(CaseChange.__table__).where(CaseChange.id <= change_id - self.retention))
+
+
+    def counts(self, attempts=3):
+        """
+        resync 用：回傳 (cursor, 各狀態案例數, 各主分類的 {total, completed, passed})。
+        查詢前後的序號相同才回傳，確保數字與 cursor 一致 (之後的變動不會被重複套用)。
+        """
+        for _ in range(attempts):
+            cursor = self.current_cursor()
+            status_counts = dict(db.session.query(TestCase.status, func.count(TestCase.id))
+                                 .group_by(TestCase.status).all())
+            rows = (db.session.query(
+                        TestCase.main_category,
+                        func.count(TestCase.id),
+                        func.sum(case((TestCase.status.in_(['通過', '失敗']), 1), else_=0)),
+                        func.sum(case((TestCase.status == '通過', 1), else_=0)))
+                    .filter(TestCase.main_category.isnot(None), TestCase.main_category != '')
+                    .group_by(TestCase.main_category)
+                    .all())
+            if self.current_cursor() == cursor:
+                break
+        categories = {name: {'total': total, 'completed': completed, 'passed': passed}
+                      for name, total, completed, passed in rows}
+        return cursor, status_counts, categories
+
+
+change_feed = ChangeFeed()
+
+
+def _history_pair(state, name):
+    history = state.attrs[name].history
+    if not history.has_changes():
+        value = getattr(state.object, name)
+        return value, value
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return old, new
+
+
+def _collect(session, case_id, status, category):
+    """同一個交易中的變動依案例合併：保留第一次的舊值與最後一次的新值。"""
+    if session.info.get('case_changes_overflow'):
+        return
+    pending = session.info.setdefault('case_changes', {})
+    if case_id in pending:
+        first = pending[case_id]
+        status = [first['status'][0], status[1]]
+        category = [first['category'][0], category[1]]
+    pending[case_id] = {'id': case_id, 'status': list(status), 'category': list(category)}
+    if len(pending) > MAX_CHANGES_PER_RECORD:
+        # 大量變動 (例如匯入) 只記錄一筆 resync，不必繼續收集
+        session.info['case_changes_overflow'] = True
+        pending.clear()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_case_changes(session, flush_context):
+    # after_flush 時 new/dirty/deleted 與屬性歷程仍是 flush 前的狀態。
+    # 匯入等流程在一個交易中會 flush 很多次，這裡只收集，commit 前才寫入一筆紀錄
+    for obj in session.new:
+        if isinstance(obj, TestCase):
+            _collect(session, obj.id, (None, obj.status), (None, obj.main_category))
+    for obj in session.deleted:
+        if isinstance(obj, TestCase):
+            state = inspect(obj)
+            _collect(session, obj.id, (_history_pair(state, 'status')[0], None),
+                     (_history_pair(state, 'main_category')[0], None))
+    for obj in session.dirty:
+        if isinstance(obj, TestCase):
+            state = inspect(obj)
+            status = _history_pair(state, 'status')
+            category = _history_pair(state, 'main_category')
+            if status[0] != status[1] or category[0] != category[1]:
+                _collect(session, obj.id, status, category)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _record_case_changes(session):
+    # before_commit 發生在 commit 的最後一次 flush 之前，先 flush 才能收集到這次的所有變動
+    session.flush()
+    overflow = session.info.pop('case_changes_overflow', False)
+    pending = session.info.pop('case_changes', {})
+    changes = [change for change in pending.values()
+               if change['status'][0] != change['status'][1] or change['category'][0] != change['category'][1]]
+    if overflow:
+        change_feed.record(session.connection(), None)
+    elif changes:
+        change_feed.record(session.connection(), changes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_case_changes(session):
+    session.info.pop('case_changes', None)
+    session.info.pop('case_changes_overflow', None)
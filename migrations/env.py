@@ -97,14 +97,30 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        # db_concurrency 會在每條 SQLite 連線上啟用 foreign_keys。batch_alter_table
+        # 以「建新表、複製、DROP 舊表」重建資料表，啟用外鍵時 DROP 會觸發
+        # ON DELETE CASCADE 或 FOREIGN KEY constraint failed，因此遷移期間先關閉。
+        # (PRAGMA foreign_keys 在交易中無效，必須在 begin_transaction 之前設定)
+        is_sqlite = connection.dialect.name == 'sqlite'
+        if is_sqlite:
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
             **conf_args
         )
 
-        with context.begin_transaction():
-            context.run_migrations()
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if is_sqlite:
+                # 連線會回到連線池，恢復 app 的設定
+                connection.rollback()
+                connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+                connection.commit()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,42 @@
+"""Add denormalized tag_names to test_case
+
+Revision ID: 3b8e5f0c7a21
+Revises: f2a7d9c41b68
+Create Date: 2026-10-19 09:41:26.315078
+
+"""
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e5f0c7a21'
+down_revision = 'f2a7d9c41b68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('test_case', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tag_names', sa.Text(), server_default='', nullable=False))
+
+    # 與 models.tag_summary 相同的格式：依名稱排序、以逗號串接
+    connection = op.get_bind()
+    names = defaultdict(set)
+    for case_id, name in connection.execute(sa.text(
+        "SELECT test_case_tags.test_case_id, tag.name FROM test_case_tags "
+        "JOIN tag ON tag.id = test_case_tags.tag_id"
+    )):
+        names[case_id].add(name)
+    if names:
+        connection.execute(
+            sa.text("UPDATE test_case SET tag_names = :tag_names WHERE id = :id"),
+            [{'id': case_id, 'tag_names': ','.join(sorted(tag_names))} for case_id, tag_names in names.items()]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('test_case', schema=None) as batch_op:
+        batch_op.drop_column('tag_names')
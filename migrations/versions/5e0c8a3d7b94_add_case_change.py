@@ -0,0 +1,31 @@
+"""Add case_change feed for live updates
+
+Revision ID: 5e0c8a3d7b94
+Revises: 9d4e1f7b2c83
+Create Date: 2026-10-19 16:40:27.903512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0c8a3d7b94'
+down_revision = '9d4e1f7b2c83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # AUTOINCREMENT：清除舊紀錄後序號也不會重複使用，頁面手上的序號才不會失準
+    op.create_table('case_change',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+
+
+def downgrade():
+    op.drop_table('case_change')
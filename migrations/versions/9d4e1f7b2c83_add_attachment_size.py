@@ -0,0 +1,30 @@
+"""Add size and filepath index to attachment
+
+Revision ID: 9d4e1f7b2c83
+Revises: 3b8e5f0c7a21
+Create Date: 2026-10-19 13:22:08.514730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4e1f7b2c83'
+down_revision = '3b8e5f0c7a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 既有附件的大小由 python storage_maintenance.py gc 回填 (需要讀取附件目錄)
+    with op.batch_alter_table('attachment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('size', sa.BigInteger(), nullable=True))
+        # 回收作業以檔名批次查詢是否仍被引用
+        batch_op.create_index(batch_op.f('ix_attachment_filepath'), ['filepath'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attachment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_attachment_filepath'))
+        batch_op.drop_column('size')
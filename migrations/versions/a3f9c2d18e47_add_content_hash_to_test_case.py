@@ -0,0 +1,48 @@
+"""Add content_hash to test_case
+
+Revision ID: a3f9c2d18e47
+Revises: 7c1e2b9d4f10
+Create Date: 2026-10-18 10:05:12.871934
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f9c2d18e47'
+down_revision = '7c1e2b9d4f10'
+branch_labels = None
+depends_on = None
+
+# 與 utils.IMPORTED_FIELDS / compute_content_hash 相同的規則 (在此固定一份，避免日後程式變動影響舊遷移)
+HASHED_COLUMNS = ['category', 'test_item', 'test_purpose', 'preconditions', 'test_steps',
+                  'expected_result', 'reference']
+
+
+def _content_hash(product_type, values):
+    payload = '\x1f'.join([product_type or ''] + ['' if v is None else str(v) for v in values])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def upgrade():
+    with op.batch_alter_table('test_case', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    # 以目前資料庫中的內容回填雜湊，讓第一次 upsert 匯入就能略過未變動的案例
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        f"SELECT id, product_type, {', '.join(HASHED_COLUMNS)} FROM test_case"
+    )).fetchall()
+    if rows:
+        connection.execute(
+            sa.text("UPDATE test_case SET content_hash = :content_hash WHERE id = :id"),
+            [{'id': row[0], 'content_hash': _content_hash(row[1], row[2:])} for row in rows]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('test_case', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
@@ -1,6 +1,7 @@
 # models.py
 from extensions import db
 from datetime import datetime
+from sqlalchemy import event, inspect
 
 # ... (test_case_tags 和 Tag 模型的定義不變) ...
 test_case_tags = db.Table('test_case_tags',
@@ -32,6 +33,13 @@ class TestCase(db.Model):
     status = db.Column(db.String(20), nullable=False, default='未執行')
     notes = db.Column(db.Text, nullable=True)
     reference = db.Column(db.String(200), nullable=True)
+    # 每次更新都會遞增，供片段快取等以 (id, version) 作為 key 的機制判斷內容是否變更
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # 最近一次匯入時 IMPORTED_FIELDS 的雜湊，重新匯入時用來判斷內容是否有變
+    content_hash = db.Column(db.String(64), nullable=True)
+    # 標籤名稱依字母排序、以逗號串接 (標籤名稱本身不含逗號)，由 ORM 事件隨 tags 同步維護；
+    # 列表、匯出與標籤篩選讀這個欄位，不需要 join test_case_tags
+    tag_names = db.Column(db.Text, nullable=False, default='', server_default='')
 
     tags = db.relationship('Tag', secondary=test_case_tags, lazy='subquery',
                            backref=db.backref('test_cases', lazy=True))
@@ -39,14 +47,135 @@ class TestCase(db.Model):
     # ★★★ 核心修正點 1: 新增與 Attachment 的關聯 ★★★
     attachments = db.relationship('Attachment', backref='test_case', lazy=True, cascade="all, delete-orphan")
 
+    @property
+    def has_attachments(self):
+        return bool(self.attachments)
+
+    @property
+    def tag_name_list(self):
+        return self.tag_names.split(',') if self.tag_names else []
+
+
+@event.listens_for(TestCase, 'before_update')
+def bump_test_case_version(mapper, connection, target):
+    # 標籤、附件等關聯變動也會讓案例被標記為 dirty，因此一併遞增版本
+    target.version = (target.version or 0) + 1
+
+
+def tag_summary(tags):
+    return ','.join(sorted({tag.name for tag in tags}))
+
+
+@event.listens_for(TestCase, 'before_insert')
+def set_tag_names(mapper, connection, target):
+    target.tag_names = tag_summary(target.tags)
+
+
+@event.listens_for(TestCase, 'before_update')
+def sync_tag_names(mapper, connection, target):
+    if inspect(target).attrs.tags.history.has_changes():
+        target.tag_names = tag_summary(target.tags)
+
 
 # ★★★ 核心修正點 2: 新增 Attachment 模型 ★★★
 class Attachment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
-    filepath = db.Column(db.String(255), nullable=False) # 相對於 ATTACHMENT_FOLDER 的路徑
+    filepath = db.Column(db.String(255), nullable=False, index=True) # 相對於 ATTACHMENT_FOLDER 的路徑
+    # 檔案大小 (bytes)，供容量統計使用；舊資料由附件回收作業回填
+    size = db.Column(db.BigInteger, nullable=True)
     uploaded_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     test_case_id = db.Column(db.Integer, db.ForeignKey('test_case.id'), nullable=False)
 
     def __repr__(self):
-        return f'<Attachment {self.filename}>'
\ No newline at end of file
+        return f'<Attachment {self.filename}>'
+
+
+class ImportRecord(db.Model):
+    """匯入紀錄：每個上傳檔案的 SHA-256 與匯入結果，用來略過已匯入過的相同檔案。"""
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    file_size = db.Column(db.Integer, nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    product_type = db.Column(db.String(50), nullable=False)
+    sheet_names = db.Column(db.Text, nullable=True)  # JSON 陣列
+    case_count = db.Column(db.Integer, nullable=False, default=0)
+    imported_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_count = db.Column(db.Integer, nullable=False, default=0)
+    upsert = db.Column(db.Boolean, nullable=False, default=False)
+    status = db.Column(db.String(20), nullable=False, default='completed')  # completed / failed
+    imported_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ImportRecord {self.filename} {self.sha256[:12]}>'
+
+
+# 執行結果以小整數儲存，順序與畫面上的狀態選項一致
+RESULT_STATUSES = ['未執行', '進行中', '通過', '失敗']
+RESULT_STATUS_CODES = {status: code for code, status in enumerate(RESULT_STATUSES)}
+
+
+class TestRun(db.Model):
+    """一次測試回合。同一時間只會有一個未結束的回合，狀態變更會記錄到該回合。"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    product_type = db.Column(db.String(50), nullable=True)  # 空值表示不限產品
+    started_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    closed_on = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<TestRun {self.name}>'
+
+
+class TestResult(db.Model):
+    """
+    只新增不修改的執行紀錄。test_case_id 不設外鍵，案例刪除後歷史仍保留；
+    main_category 記錄執行當下的分類，讓彙總在案例重新分類後仍能正確扣回。
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('test_run.id'), nullable=False)
+    test_case_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.SmallInteger, nullable=False)
+    main_category = db.Column(db.String(50), nullable=False, default='')
+    recorded_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_test_result_run_case', 'run_id', 'test_case_id'),
+    )
+
+
+class TestRunRollup(db.Model):
+    """每個回合、每個主分類、每種狀態的案例數 (以每個案例在該回合的最新結果計算)，寫入時即時維護。"""
+    run_id = db.Column(db.Integer, db.ForeignKey('test_run.id'), primary_key=True)
+    main_category = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.SmallInteger, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CaseSignature(db.Model):
+    """
+    案例文字的 MinHash 簽章 (NUM_PERM 個 uint32)，供相似案例比對使用。
+    CaseSignature/CaseLshBucket 的 ondelete='CASCADE' 由資料庫執行，
+    SQLite 需要 PRAGMA foreign_keys=ON (見 db_concurrency.DEFAULT_SQLITE_PRAGMAS)。
+    """
+    test_case_id = db.Column(db.Integer, db.ForeignKey('test_case.id', ondelete='CASCADE'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)
+
+
+class CaseLshBucket(db.Model):
+    """LSH 分桶：每個案例每個 band 一筆，bucket_key 相同的案例即為相似候選。"""
+    bucket_key = db.Column(db.BigInteger, primary_key=True)
+    test_case_id = db.Column(db.Integer, db.ForeignKey('test_case.id', ondelete='CASCADE'), primary_key=True,
+                             index=True)
+
+
+class CaseChange(db.Model):
+    """
+    案例狀態/主分類的變動紀錄，與變動本身在同一個交易中寫入 (見 live_updates.py)。
+    id 是所有 worker 共用的遞增序號，頁面以輪詢取得某個序號之後的變動；只保留最近的部分。
+    """
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_on = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    payload = db.Column(db.Text, nullable=False)  # JSON 陣列：[{id, status: [舊, 新], category: [舊, 新]}]
@@ -0,0 +1,66 @@
+# preview_rules.py
+"""
+預覽分類規則變更的影響：列出套用提議的規則後，fix_categories.py 會移動哪些案例。
+不會修改 category_rules.json 或資料庫。
+
+    python preview_rules.py proposed_rules.json
+    python preview_rules.py proposed_rules.json --product 郵件閘道 --limit 20
+
+proposed_rules.json 的格式與 category_rules.json 相同，可以只包含要變更的產品。
+"""
+import json
+import time
+import argparse
+
+from app import create_app
+from rule_impact import rule_index
+
+
+def _format_category(category):
+    main, sub = category
+    return f"{main} / {sub}" if sub else f"{main}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='預覽分類規則變更的影響')
+    parser.add_argument('rules', help='提議的規則檔 (JSON)')
+    parser.add_argument('--product', action='append', help='只預覽指定的產品，可重複指定')
+    parser.add_argument('--limit', type=int, default=50, help='最多列出幾筆會移動的案例')
+    args = parser.parse_args()
+
+    with open(args.rules, encoding='utf-8') as f:
+        proposed = json.load(f)
+    if args.product:
+        proposed = {product: rules for product, rules in proposed.items() if product in args.product}
+
+    app = create_app()
+    with app.app_context():
+        start = time.perf_counter()
+        rule_index.preview({})  # 建立索引，讓下面的計時只包含預覽本身
+        built = time.perf_counter()
+        impact = rule_index.preview(proposed)
+        elapsed = time.perf_counter() - built
+
+    print(f"共檢查 {impact.case_count} 筆案例，{len(impact.moves)} 筆會移動分類"
+          f" (建立索引 {built - start:.2f} 秒，預覽 {elapsed * 1000:.1f} 毫秒)。")
+    if impact.drifted:
+        print(f"另有 {impact.drifted} 筆案例的分類已與目前規則不一致，執行 fix_categories.py 時也會被修正。")
+
+    if impact.by_target:
+        print("\n移入：")
+        for (product, main, sub), count in impact.by_target.most_common():
+            print(f"  [{product}] {_format_category((main, sub))}: +{count}")
+        print("\n移出：")
+        for (product, main, sub), count in impact.by_source.most_common():
+            print(f"  [{product}] {_format_category((main, sub))}: -{count}")
+
+    if impact.moves:
+        print("\n案例：")
+        for move in impact.moves[:args.limit]:
+            print(f"  {move.case_id}: {_format_category(move.old)} -> {_format_category(move.new)}")
+        if len(impact.moves) > args.limit:
+            print(f"  ... 另有 {len(impact.moves) - args.limit} 筆")
+
+
+if __name__ == '__main__':
+    main()
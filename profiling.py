@@ -0,0 +1,130 @@
+# profiling.py
+"""
+選擇性啟用的單一請求 profiler。
+
+PROFILING_ENABLED 為 True 且請求帶有正確的 PROFILING_TOKEN
+(query 參數 _profile=<token> 或標頭 X-Profile-Token) 時，
+以 cProfile 包住整個請求，結果存成 instance/profiles/*.prof，
+可用 snakeviz、flameprof 等工具產生火焰圖。/_profiles 列出最近的紀錄。
+"""
+import os
+import json
+import time
+import uuid
+import hmac
+import cProfile
+from datetime import datetime
+
+from flask import g, request, abort, render_template, send_from_directory
+
+PROFILE_TOKEN_PARAM = '_profile'
+PROFILE_TOKEN_HEADER = 'X-Profile-Token'
+
+
+def _token_matches(app, supplied):
+    token = app.config.get('PROFILING_TOKEN')
+    return bool(token and supplied) and hmac.compare_digest(str(token), str(supplied))
+
+
+def _request_token():
+    return request.args.get(PROFILE_TOKEN_PARAM) or request.headers.get(PROFILE_TOKEN_HEADER)
+
+
+def _enforce_retention(profile_dir, keep):
+    profiles = sorted(
+        (entry for entry in os.scandir(profile_dir) if entry.name.endswith('.prof')),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in profiles[keep:]:
+        for path in (entry.path, entry.path[:-len('.prof')] + '.json'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def list_profiles(profile_dir):
+    """回傳最近的 profile 紀錄 (依時間由新到舊)。"""
+    records = []
+    if not os.path.isdir(profile_dir):
+        return records
+    for entry in os.scandir(profile_dir):
+        if not entry.name.endswith('.json'):
+            continue
+        try:
+            with open(entry.path, 'r', encoding='utf-8') as f:
+                records.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+    records.sort(key=lambda record: record.get('created_at', ''), reverse=True)
+    return records
+
+
+def init_profiling(app):
+    app.config.setdefault('PROFILING_ENABLED', False)
+    app.config.setdefault('PROFILING_TOKEN', os.environ.get('PROFILING_TOKEN'))
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config.setdefault('PROFILE_RETENTION', 50)
+    if not app.config['PROFILING_ENABLED']:
+        return
+
+    profile_dir = app.config['PROFILE_DIR']
+    os.makedirs(profile_dir, exist_ok=True)
+
+    @app.before_request
+    def start_profiler():
+        if request.endpoint in ('profile_index', 'download_profile', 'static'):
+            return
+        if not _token_matches(app, _request_token()):
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # 同一執行緒已有其他 profiler 在執行
+            return
+        g._profiler = profiler
+        g._profile_start = time.perf_counter()
+
+    @app.after_request
+    def save_profile(response):
+        profiler = g.pop('_profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        duration_ms = (time.perf_counter() - g.pop('_profile_start')) * 1000
+
+        created_at = datetime.now()
+        name = f"{created_at:%Y%m%d-%H%M%S}_{request.endpoint or 'unknown'}_{uuid.uuid4().hex[:8]}"
+        profiler.dump_stats(os.path.join(profile_dir, f'{name}.prof'))
+        metadata = {
+            'name': name,
+            'file': f'{name}.prof',
+            'created_at': created_at.isoformat(timespec='seconds'),
+            'method': request.method,
+            'route': request.url_rule.rule if request.url_rule else request.path,
+            'path': request.path,
+            'args': {k: v for k, v in request.args.items() if k != PROFILE_TOKEN_PARAM},
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 1),
+        }
+        with open(os.path.join(profile_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        _enforce_retention(profile_dir, app.config['PROFILE_RETENTION'])
+
+        response.headers['X-Profile-Name'] = name
+        return response
+
+    @app.route('/_profiles')
+    def profile_index():
+        token = _request_token()
+        if not _token_matches(app, token):
+            abort(404)
+        return render_template('profiles.html', profiles=list_profiles(profile_dir),
+                               token=token, hide_sidebar=True)
+
+    @app.route('/_profiles/<path:filename>')
+    def download_profile(filename):
+        if not _token_matches(app, _request_token()) or not filename.endswith('.prof'):
+            abort(404)
+        return send_from_directory(profile_dir, filename, as_attachment=True)
@@ -0,0 +1,260 @@
+# rule_impact.py
+"""
+分類規則變更的影響預覽。
+
+categorize_case 檢查關鍵字是否出現在案例文字中 (utils.categorization_text，
+案例欄位與 fix_categories.py 相同，由 utils.case_data_from_case 組出)，依規則順序
+取第一個符合的分類。這裡為所有案例的比對文字建立字元 bigram 的反向索引，
+記憶體中只保留 bigram posting 與案例 id，不保留案例文字：
+兩個字的關鍵字直接取 posting；更長的關鍵字以其所有 bigram posting 的交集為候選，
+一次向資料庫讀取所有候選案例的文字做子字串比對確認。依規則順序把各關鍵字的
+命中集合分派出去，就能得到整個產品在某組規則下的分類結果，不必逐筆重新分類。
+
+比較目前規則與提議規則下的分類結果，得到的就是套用新規則後執行
+fix_categories.py 會移動的案例。本行程內案例內容有異動並 commit 後索引會失效重建；
+其他 worker 的異動在 RULE_INDEX_TTL 秒後反映。
+"""
+import time
+import threading
+from array import array
+from collections import namedtuple, Counter, defaultdict
+from sqlalchemy import event, inspect
+
+from extensions import db
+from models import TestCase
+from utils import categorization_text, case_data_from_case, load_category_rules
+
+UNCATEGORIZED = ('其他', '未分類')
+# categorization_text 用到的欄位 (見 utils.case_data_from_case)
+TEXT_FIELDS = ('category', 'test_item', 'test_steps')
+# 再加上用來計算「資料庫與目前規則不一致」的分類欄位
+INDEXED_FIELDS = ('product_type',) + TEXT_FIELDS + ('main_category', 'sub_category')
+# 確認候選案例時，SQLite 單一查詢的參數上限較低，IN 查詢分批進行
+IN_CLAUSE_CHUNK_SIZE = 500
+
+RuleMove = namedtuple('RuleMove', ['id', 'case_id', 'product_type', 'old', 'new'])
+RuleImpact = namedtuple('RuleImpact', ['moves', 'by_target', 'by_source', 'case_count', 'drifted'])
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def validate_rules(rules):
+    """檢查提議的規則格式 ({產品: 規則串列})，格式錯誤時拋出 ValueError。"""
+    if not isinstance(rules, dict):
+        raise ValueError('規則必須是以產品為 key 的物件。')
+    for product, product_rules in rules.items():
+        if product == 'global_preconditions':
+            continue
+        if not isinstance(product_rules, list):
+            raise ValueError(f'產品 "{product}" 的規則必須是串列。')
+        for rule in product_rules:
+            if isinstance(rule, str):
+                continue
+            if (not isinstance(rule, dict) or not isinstance(rule.get('keywords'), list)
+                    or 'main_category' not in rule or 'sub_category' not in rule):
+                raise ValueError(f'產品 "{product}" 的規則需包含 keywords、main_category 與 sub_category。')
+
+
+class RuleIndex:
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._cases = {}
+        self._by_product = defaultdict(set)
+        self._postings = {}
+        self._matches = {}
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault('RULE_INDEX_TTL', self.ttl)
+        app.extensions['rule_index'] = self
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            cases = {}
+            by_product = defaultdict(set)
+            postings = defaultdict(list)
+            columns = [TestCase.id, TestCase.case_id] + [getattr(TestCase, name) for name in INDEXED_FIELDS]
+            for row in db.session.query(*columns).execution_options(yield_per=5000):
+                text = categorization_text(case_data_from_case(row))
+                cases[row.id] = (row.case_id, row.product_type, (row.main_category, row.sub_category))
+                by_product[row.product_type].add(row.id)
+                for gram in _bigrams(text):
+                    postings[gram].append(row.id)
+
+            self._cases = cases
+            self._by_product = by_product
+            self._postings = {gram: array('i', ids) for gram, ids in postings.items()}
+            self._matches = {}
+            self._loaded_at = time.monotonic()
+
+    def _load_texts(self, ids):
+        """從資料庫讀取指定案例目前的比對文字。"""
+        ids = list(ids)
+        texts = {}
+        columns = [TestCase.id] + [getattr(TestCase, name) for name in TEXT_FIELDS]
+        for i in range(0, len(ids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = ids[i:i + IN_CLAUSE_CHUNK_SIZE]
+            for row in db.session.query(*columns).filter(TestCase.id.in_(chunk)):
+                texts[row.id] = categorization_text(case_data_from_case(row))
+        return texts
+
+    def _match_all(self, keywords):
+        """計算尚未快取的關鍵字 (不分大小寫) 的命中集合。"""
+        postings = self._postings
+        pending = {}
+        for keyword in {keyword.lower() for keyword in keywords} - self._matches.keys():
+            if len(keyword) == 2:
+                # 兩個字的關鍵字，posting 本身就是完整的比對結果
+                self._matches[keyword] = frozenset(postings.get(keyword, ()))
+            elif not keyword:
+                self._matches[keyword] = frozenset(self._cases)
+            elif len(keyword) == 1:
+                # 比對文字至少兩個字 (欄位之間以空白分隔)，每個字元都出現在某個 bigram 中
+                self._matches[keyword] = frozenset().union(
+                    *(ids for gram, ids in postings.items() if keyword in gram))
+            else:
+                lists = sorted((postings.get(gram, ()) for gram in _bigrams(keyword)), key=len)
+                candidates = set(lists[0])
+                for ids in lists[1:]:
+                    if not candidates:
+                        break
+                    candidates.intersection_update(ids)
+                pending[keyword] = candidates
+
+        if pending:
+            # 所有待確認關鍵字的候選案例只讀取一次，文字用完即丟
+            texts = self._load_texts(set().union(*pending.values()))
+            for keyword, candidates in pending.items():
+                self._matches[keyword] = frozenset(
+                    case_id for case_id in candidates if keyword in texts.get(case_id, ''))
+
+    def match(self, keyword):
+        """回傳比對文字中包含 keyword (不分大小寫) 的案例 id 集合。"""
+        self._match_all([keyword])
+        return self._matches[keyword.lower()]
+
+    def assign(self, product_type, product_rules):
+        """回傳 {案例 id: (主分類, 子分類)}，與對該產品每個案例執行 categorize_case 的結果相同。"""
+        ids = self._by_product.get(product_type, set())
+        if not product_rules:
+            return dict.fromkeys(ids, UNCATEGORIZED)
+
+        if isinstance(product_rules[0], str):
+            self._match_all(product_rules)
+            hits = set().union(*(self.match(keyword) for keyword in product_rules)) & ids
+            return {case_id: (product_type, None) if case_id in hits else (product_type, '未分類')
+                    for case_id in ids}
+
+        self._match_all(keyword for rule in product_rules for keyword in rule['keywords'])
+        assigned = {}
+        remaining = set(ids)
+        for rule in product_rules:
+            if not remaining:
+                break
+            hits = set().union(*(self.match(keyword) for keyword in rule['keywords'])) & remaining
+            target = (rule['main_category'], rule['sub_category'])
+            for case_id in hits:
+                assigned[case_id] = target
+            remaining -= hits
+        assigned.update(dict.fromkeys(remaining, UNCATEGORIZED))
+        return assigned
+
+    def preview(self, proposed_rules, current_rules=None):
+        """
+        比較目前規則與提議規則 ({產品: 規則串列}，未列出的產品視為不變) 下的分類結果。
+        回傳 RuleImpact：moves 為會移動的案例，by_target / by_source 依
+        (產品, 主分類, 子分類) 統計移入與移出的案例數，drifted 為資料庫中的分類
+        已與目前規則不一致的案例數 (不論規則是否變更，fix_categories.py 都會修正它們)。
+        """
+        validate_rules(proposed_rules)
+        if current_rules is None:
+            current_rules = load_category_rules()
+        self._ensure_loaded()
+
+        moves = []
+        by_target = Counter()
+        by_source = Counter()
+        case_count = 0
+        drifted = 0
+        for product_type, product_rules in proposed_rules.items():
+            if product_type == 'global_preconditions':
+                continue
+            current = self.assign(product_type, current_rules.get(product_type))
+            proposed = current if product_rules == current_rules.get(product_type) \
+                else self.assign(product_type, product_rules)
+            case_count += len(current)
+            for case_id, old in current.items():
+                case_id_text, _, stored = self._cases[case_id]
+                if stored != old:
+                    drifted += 1
+                new = proposed[case_id]
+                if new != old:
+                    moves.append(RuleMove(case_id, case_id_text, product_type, old, new))
+                    by_target[(product_type,) + new] += 1
+                    by_source[(product_type,) + old] += 1
+
+        moves.sort(key=lambda move: move.case_id)
+        return RuleImpact(moves, by_target, by_source, case_count, drifted)
+
+
+rule_index = RuleIndex()
+
+
+def impact_to_dict(impact, limit=None):
+    """轉成可輸出為 JSON 的 dict；limit 限制列出的案例數 (統計仍包含全部)。"""
+    def counts(counter):
+        return [{'product_type': product, 'main_category': main, 'sub_category': sub, 'count': count}
+                for (product, main, sub), count in counter.most_common()]
+
+    moves = impact.moves if limit is None else impact.moves[:limit]
+    return {
+        'case_count': impact.case_count,
+        'moved': len(impact.moves),
+        'drifted': impact.drifted,
+        'by_target': counts(impact.by_target),
+        'by_source': counts(impact.by_source),
+        'moves': [{'id': move.id, 'case_id': move.case_id, 'product_type': move.product_type,
+                   'from': list(move.old), 'to': list(move.new)} for move in moves],
+    }
+
+
+def _touches_indexed_fields(session):
+    for obj in session.new:
+        if isinstance(obj, TestCase):
+            return True
+    for obj in session.deleted:
+        if isinstance(obj, TestCase):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, TestCase):
+            attrs = inspect(obj).attrs
+            if any(attrs[name].history.has_changes() for name in INDEXED_FIELDS):
+                return True
+    return False
+
+
+@event.listens_for(db.session, 'before_flush')
+def _mark_case_changes(session, flush_context, instances):
+    if not session.info.get('rule_index_dirty') and _touches_indexed_fields(session):
+        session.info['rule_index_dirty'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('rule_index_dirty', False):
+        rule_index.invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('rule_index_dirty', None)
@@ -0,0 +1,135 @@
+# run_history.py
+"""
+測試回合與執行歷史。
+
+案例的狀態變更會附加一筆 TestResult 到目前未結束的回合，並同步維護
+TestRunRollup (回合 × 主分類 × 狀態 的案例數)。儀表板的趨勢圖只讀取彙總表，
+不需要掃描原始結果。
+"""
+from datetime import datetime
+from sqlalchemy import func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from extensions import db
+from models import TestRun, TestResult, TestRunRollup, RESULT_STATUS_CODES
+
+
+def get_open_run():
+    return TestRun.query.filter(TestRun.closed_on.is_(None)).order_by(TestRun.id.desc()).first()
+
+
+def start_run(name, product_type=None):
+    """開始新的回合，先前未結束的回合會一併結束。呼叫端負責 commit。"""
+    now = datetime.utcnow()
+    for run in TestRun.query.filter(TestRun.closed_on.is_(None)).all():
+        run.closed_on = now
+    run = TestRun(name=name, product_type=product_type or None, started_on=now)
+    db.session.add(run)
+    return run
+
+
+def _adjust_rollup(run_id, main_category, status, delta):
+    """
+    在資料庫中原子地調整彙總數 (count = count + delta)，多個 worker 同時寫入時不會遺失更新。
+    資料列還不存在時以 INSERT ... ON CONFLICT 新增，同時新增的另一個 worker 會改為累加。
+    """
+    result = db.session.execute(
+        update(TestRunRollup)
+        .where(TestRunRollup.run_id == run_id,
+               TestRunRollup.main_category == main_category,
+               TestRunRollup.status == status)
+        .values(count=TestRunRollup.count + delta)
+        .execution_options(synchronize_session=False))
+    if result.rowcount:
+        return
+    insert_stmt = sqlite_insert(TestRunRollup).values(run_id=run_id, main_category=main_category,
+                                                      status=status, count=delta)
+    db.session.execute(insert_stmt.on_conflict_do_update(
+        index_elements=['run_id', 'main_category', 'status'],
+        set_={'count': TestRunRollup.count + insert_stmt.excluded.count}))
+
+
+def record_result(case, run=None):
+    """
+    將案例目前的狀態記錄到回合 (預設為未結束的回合)。
+    沒有進行中的回合、案例不屬於回合的產品或狀態無法辨識時不記錄，回傳 None。
+    呼叫端負責 commit。
+    """
+    run = run or get_open_run()
+    status = RESULT_STATUS_CODES.get(case.status)
+    if run is None or status is None:
+        return None
+    if run.product_type and case.product_type != run.product_type:
+        return None
+
+    main_category = case.main_category or ''
+    previous = (TestResult.query
+                .filter_by(run_id=run.id, test_case_id=case.id)
+                .order_by(TestResult.id.desc())
+                .first())
+
+    result = TestResult(run_id=run.id, test_case_id=case.id, status=status, main_category=main_category)
+    db.session.add(result)
+
+    if previous is None or (previous.status, previous.main_category) != (status, main_category):
+        if previous is not None:
+            _adjust_rollup(run.id, previous.main_category, previous.status, -1)
+        _adjust_rollup(run.id, main_category, status, 1)
+    return result
+
+
+def rebuild_rollups(run_id):
+    """由原始結果重新計算某個回合的彙總 (僅供修復資料使用)。呼叫端負責 commit。"""
+    latest_ids = (db.session.query(func.max(TestResult.id))
+                  .filter(TestResult.run_id == run_id)
+                  .group_by(TestResult.test_case_id))
+    counts = (db.session.query(TestResult.main_category, TestResult.status, func.count())
+              .filter(TestResult.id.in_(latest_ids))
+              .group_by(TestResult.main_category, TestResult.status)
+              .all())
+    TestRunRollup.query.filter_by(run_id=run_id).delete()
+    for main_category, status, count in counts:
+        db.session.add(TestRunRollup(run_id=run_id, main_category=main_category, status=status, count=count))
+
+
+def _summarize(counts):
+    executed = sum(counts)
+    passed, failed = counts[RESULT_STATUS_CODES['通過']], counts[RESULT_STATUS_CODES['失敗']]
+    finished = passed + failed
+    return {
+        'executed': executed,
+        'passed': passed,
+        'failed': failed,
+        'pass_rate': round(passed / finished * 100, 1) if finished else None,
+    }
+
+
+def run_trend(limit=200):
+    """最近 limit 個回合的通過率趨勢，依回合先後排序。"""
+    runs = TestRun.query.order_by(TestRun.id.desc()).limit(limit).all()
+    if not runs:
+        return []
+    run_ids = [run.id for run in runs]
+
+    counts = {run_id: [0] * len(RESULT_STATUS_CODES) for run_id in run_ids}
+    rows = (db.session.query(TestRunRollup.run_id, TestRunRollup.status, func.sum(TestRunRollup.count))
+            .filter(TestRunRollup.run_id.in_(run_ids))
+            .group_by(TestRunRollup.run_id, TestRunRollup.status)
+            .all())
+    for run_id, status, count in rows:
+        counts[run_id][status] = count
+
+    return [dict(_summarize(counts[run.id]), id=run.id, name=run.name, product_type=run.product_type,
+                 started_on=run.started_on.strftime('%Y-%m-%d'), closed=run.closed_on is not None)
+            for run in reversed(runs)]
+
+
+def run_category_summary(run_id):
+    """單一回合各主分類的執行統計。"""
+    per_category = {}
+    for main_category, status, count in (db.session.query(TestRunRollup.main_category, TestRunRollup.status,
+                                                          TestRunRollup.count)
+                                         .filter(TestRunRollup.run_id == run_id).all()):
+        per_category.setdefault(main_category, [0] * len(RESULT_STATUS_CODES))[status] += count
+    return [dict(_summarize(counts), category=main_category or '未分類')
+            for main_category, counts in sorted(per_category.items())]
@@ -1,22 +1,45 @@
-import pandas as pd
+import io
 import re
+import json
+import hashlib
+from collections import namedtuple, Counter
 from sqlalchemy.exc import IntegrityError
-from models import TestCase, Tag
+from models import TestCase, Tag, ImportRecord
 from extensions import db
-from utils import categorize_case, process_tags, update_global_preconditions
+from utils import (categorize_case, process_tags, update_global_preconditions,
+                   IMPORTED_FIELDS, compute_content_hash)
+from instrumentation import timed_section
+from workbook_cache import workbook_cache
+from similarity import (SIMILARITY_FIELDS, case_text, compute_signature, find_near_duplicates,
+                        store_signatures)
 
-def process_excel_file(file_stream, filename, selected_product_type):
+ImportResult = namedtuple('ImportResult', ['imported', 'updated', 'unchanged', 'case_count', 'sheet_names',
+                                           'near_duplicates'])
+ParsedWorkbook = namedtuple('ParsedWorkbook', ['cases', 'sheet_names', 'preconditions_text'])
+
+# SQLite 單一查詢的參數上限較低，IN 查詢分批進行
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# 相似度比對使用的欄位 (Excel 標頭)，順序與 SIMILARITY_FIELDS 相同
+SIMILARITY_HEADERS = [dict(IMPORTED_FIELDS)[field] for field in SIMILARITY_FIELDS]
+
+
+def parse_workbook(file_bytes):
     """
-    處理上傳的 Excel 檔案，並將測試案例存入資料庫。
+    解析 Excel：找出每張工作表中含 'Case ID' 的標頭列並合併成一個表格。
+    第一張非空白工作表的 A1 視為全域前置條件。
+    回傳的表格所有欄位都已轉為字串 (空白儲存格為 '')。
     """
+    # pandas 載入成本高，只在實際匯入時才 import
+    import pandas as pd
+
     try:
-        all_sheets_dict = pd.read_excel(file_stream, engine='openpyxl', sheet_name=None, header=None)
-        
+        with timed_section('excel'):
+            all_sheets_dict = pd.read_excel(io.BytesIO(file_bytes), engine='openpyxl', sheet_name=None, header=None)
+
         processed_sheets_data = []
+        preconditions_text = None
         is_first_sheet = True
-        
-        # --- ▼▼▼ 核心修改處 1：在解析檔名後儲存 precond_key ▼▼▼ ---
-        precondition_key = selected_product_type # 預設使用產品類型作為 key
 
         # 遍歷每一個讀取進來的工作表
         for sheet_name, sheet_df in all_sheets_dict.items():
@@ -24,20 +47,9 @@ def process_excel_file(file_stream, filename, selected_product_type):
                 continue
 
             if is_first_sheet:
-                # 只有 Spec 和 Tests 類型需要從檔名決定 precond_key
-                if selected_product_type in ["Smail-Spec", "Smail-Tests"]:
-                    match = re.search(r'(Spec|Tests)[#-_]?(\d{3,})', filename, re.IGNORECASE)
-                    if match:
-                        # 如果檔名匹配成功，就用 Spec#ID 作為儲存前置條件的 key
-                        precondition_key = f"{match.group(1).capitalize()}#{match.group(2)}"
-
                 if pd.notna(sheet_df.iloc[0, 0]):
                     preconditions_text = str(sheet_df.iloc[0, 0])
-                    # 使用解析出的 precondition_key 來更新 JSON 檔案
-                    update_global_preconditions(precondition_key, preconditions_text)
-                
                 is_first_sheet = False
-        # --- ▲▲▲ 修改結束 ▲▲▲ ---
 
             header_row_index = -1
             for i, row_series in sheet_df.iterrows():
@@ -47,7 +59,7 @@ def process_excel_file(file_stream, filename, selected_product_type):
                         break
                 if header_row_index != -1:
                     break
-            
+
             if header_row_index != -1:
                 new_header = sheet_df.iloc[header_row_index]
                 case_data_df = sheet_df.iloc[header_row_index + 1:]
@@ -63,6 +75,62 @@ def process_excel_file(file_stream, filename, selected_product_type):
         raise ValueError(f"無法讀取或解析 Excel 檔案：{e}")
 
     df = df.fillna('')
+    # 沒有標頭名稱的欄位不會被使用，去掉後統一轉成字串 (與逐列 str() 的結果相同)，方便以 Parquet 快取
+    df = df.loc[:, [isinstance(column, str) and column != '' for column in df.columns]].astype(str)
+    return ParsedWorkbook(df, [str(name) for name in all_sheets_dict], preconditions_text)
+
+
+def load_parsed_workbook(file_bytes, digest=None):
+    """先查詢活頁簿快取，沒有時才解析 Excel 並寫入快取。"""
+    digest = digest or hashlib.sha256(file_bytes).hexdigest()
+    cached = workbook_cache.get(digest)
+    if cached is not None:
+        df, metadata = cached
+        return ParsedWorkbook(df, metadata['sheet_names'], metadata['preconditions_text'])
+
+    parsed = parse_workbook(file_bytes)
+    workbook_cache.put(digest, parsed.cases, {
+        'sheet_names': parsed.sheet_names,
+        'preconditions_text': parsed.preconditions_text,
+    })
+    return parsed
+
+
+def categorize_imported_row(case_data, filename, selected_product_type):
+    """Spec / Tests 類型依檔名決定主分類，其餘依 category_rules.json 分類。"""
+    if selected_product_type in ["Smail-Spec", "Smail-Tests"]:
+        match = re.search(r'(Spec|Tests)[#-_]?(\d{3,})', filename, re.IGNORECASE)
+        if match:
+            return f"{match.group(1).capitalize()}#{match.group(2)}", None
+        return '未分類', None
+    return categorize_case(case_data, selected_product_type)
+
+
+def process_excel_file(file_stream, filename, selected_product_type, upsert=False, dry_run=False, digest=None):
+    """
+    處理上傳的 Excel 檔案，並將測試案例存入資料庫。
+
+    預設只新增 Case ID 尚未存在的案例；upsert=True 時，已存在的案例會比對
+    匯入欄位的內容雜湊，只有內容有變動的才會更新 (狀態、實際結果、備註、
+    標籤與附件維持不變)。dry_run=True 時只計算結果，不寫入資料庫與前置條件。
+    新增或變動的案例會與相似案例索引比對，near_duplicates 列出高度相似的案例。
+    回傳 ImportResult。
+    """
+    import pandas as pd
+
+    file_bytes = file_stream.read()
+    parsed = load_parsed_workbook(file_bytes, digest)
+    df = parsed.cases
+
+    if parsed.preconditions_text and not dry_run:
+        precondition_key = selected_product_type # 預設使用產品類型作為 key
+        # 只有 Spec 和 Tests 類型需要從檔名決定 precond_key
+        if selected_product_type in ["Smail-Spec", "Smail-Tests"]:
+            match = re.search(r'(Spec|Tests)[#-_]?(\d{3,})', filename, re.IGNORECASE)
+            if match:
+                # 如果檔名匹配成功，就用 Spec#ID 作為儲存前置條件的 key
+                precondition_key = f"{match.group(1).capitalize()}#{match.group(2)}"
+        update_global_preconditions(precondition_key, parsed.preconditions_text)
 
     required_columns = ['Case ID', '測試項目']
     for col in required_columns:
@@ -70,28 +138,46 @@ def process_excel_file(file_stream, filename, selected_product_type):
             raise ValueError(f"Excel 檔案中缺少必要的欄位：'{col}'")
 
     imported_count = 0
-    existing_case_ids = {case.case_id for case in TestCase.query.with_entities(TestCase.case_id).all()}
+    updated_count = 0
+    unchanged_count = 0
+    case_count = 0
+
+    # 一次計算所有列的內容雜湊，再與資料庫中的雜湊比對
+    hash_columns = [
+        df[header].astype(str) if header in df.columns else pd.Series('', index=df.index)
+        for _, header in IMPORTED_FIELDS
+    ]
+    df['_content_hash'] = [compute_content_hash(selected_product_type, values) for values in zip(*hash_columns)]
+    existing_hashes = dict(TestCase.query.with_entities(TestCase.case_id, TestCase.content_hash).all())
 
+    rows_to_update = {}
+    similarity_texts = {}
+    new_cases = []
     for index, row in df.iterrows():
         case_id = str(row.get('Case ID', '')).strip()
-        if not case_id or case_id in existing_case_ids:
+        if not case_id:
+            continue
+        case_count += 1
+
+        if case_id in existing_hashes:
+            if not upsert:
+                continue
+            if existing_hashes[case_id] == row['_content_hash']:
+                unchanged_count += 1
+            else:
+                rows_to_update[case_id] = row
+                similarity_texts[case_id] = case_text(str(row.get(header, '')) for header in SIMILARITY_HEADERS)
+            continue
+
+        similarity_texts[case_id] = case_text(str(row.get(header, '')) for header in SIMILARITY_HEADERS)
+        if dry_run:
+            existing_hashes[case_id] = row['_content_hash']
+            imported_count += 1
             continue
 
         case_data = row.to_dict()
         product_type = selected_product_type
-        main_cat = None
-        sub_cat = None
-
-        if product_type in ["Smail-Spec", "Smail-Tests"]:
-            product_type = selected_product_type
-            match = re.search(r'(Spec|Tests)[#-_]?(\d{3,})', filename, re.IGNORECASE)
-            if match:
-                main_cat = f"{match.group(1).capitalize()}#{match.group(2)}"
-            else:
-                main_cat = '未分類'
-            sub_cat = None
-        else:
-            main_cat, sub_cat = categorize_case(case_data, product_type)
+        main_cat, sub_cat = categorize_imported_row(case_data, filename, selected_product_type)
 
         new_case = TestCase(
             case_id=case_id,
@@ -107,14 +193,45 @@ def process_excel_file(file_stream, filename, selected_product_type):
             status='未執行',
             notes=str(row.get('備註', '')),
             reference=str(row.get('參考資料', '')),
+            content_hash=row['_content_hash'],
             tags=process_tags(str(row.get('標籤', '')))
         )
         db.session.add(new_case)
-        existing_case_ids.add(case_id)
+        new_cases.append(new_case)
+        existing_hashes[case_id] = row['_content_hash']
         imported_count += 1
 
-    if imported_count > 0:
+    # 只比對新增或內容有變動的案例，候選對象由 LSH 分桶取得，不做全表兩兩比對
+    with timed_section('similarity'):
+        signatures = {case_id: compute_signature(text) for case_id, text in similarity_texts.items()}
+        near_duplicates = find_near_duplicates(signatures)
+
+    if dry_run:
+        # 試算不建立也不載入任何 ORM 物件，避免取得資料庫寫入鎖
+        return ImportResult(imported_count, len(rows_to_update), unchanged_count, case_count, parsed.sheet_names,
+                            near_duplicates)
+
+    # 只載入內容有變動的案例並更新匯入欄位
+    changed_ids = list(rows_to_update)
+    updated_cases = []
+    for i in range(0, len(changed_ids), IN_CLAUSE_CHUNK_SIZE):
+        chunk = changed_ids[i:i + IN_CLAUSE_CHUNK_SIZE]
+        for case in TestCase.query.filter(TestCase.case_id.in_(chunk)).all():
+            row = rows_to_update[case.case_id]
+            for field, header in IMPORTED_FIELDS:
+                # 檔案中沒有的欄位 (例如舊資料的 category) 保留原值
+                if header in df.columns:
+                    setattr(case, field, str(row.get(header, '')))
+            case.product_type = selected_product_type
+            case.main_category, case.sub_category = categorize_imported_row(row.to_dict(), filename, selected_product_type)
+            case.content_hash = row['_content_hash']
+            updated_cases.append(case)
+            updated_count += 1
+
+    if imported_count > 0 or updated_count > 0:
         try:
+            db.session.flush()
+            store_signatures({case.id: signatures[case.case_id] for case in new_cases + updated_cases})
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
@@ -123,4 +240,66 @@ def process_excel_file(file_stream, filename, selected_product_type):
             db.session.rollback()
             raise IOError(f"寫入資料庫時發生未知錯誤：{e}")
 
-    return imported_count
\ No newline at end of file
+    return ImportResult(imported_count, updated_count, unchanged_count, case_count, parsed.sheet_names,
+                        near_duplicates)
+
+
+def preview_workbook_categories(file_bytes, filename, selected_product_type):
+    """依目前的分類規則，統計檔案中每個 (主分類, 子分類) 的案例數，不寫入資料庫。"""
+    parsed = load_parsed_workbook(file_bytes)
+    counts = Counter()
+    for case_data in parsed.cases.to_dict('records'):
+        if str(case_data.get('Case ID', '')).strip():
+            counts[categorize_imported_row(case_data, filename, selected_product_type)] += 1
+    return counts
+
+
+def find_completed_import(digest, product_type, upsert=False):
+    """
+    查詢相同內容 (SHA-256) 的檔案是否已成功匯入到同一個產品類型。
+    upsert 匯入需要先前的紀錄也是 upsert，才能確定已存在的案例都已同步。
+    """
+    query = ImportRecord.query.filter_by(sha256=digest, product_type=product_type, status='completed')
+    if upsert:
+        query = query.filter_by(upsert=True)
+    return query.order_by(ImportRecord.imported_on.desc()).first()
+
+
+def import_uploaded_file(file_bytes, filename, selected_product_type, upsert=False, force=False, dry_run=False):
+    """
+    匯入上傳的檔案並寫入匯入紀錄。
+    若相同檔案已成功匯入過且未指定 force，會在解析前直接略過，
+    回傳 (None, 先前的 ImportRecord)；否則回傳 (ImportResult, 新的 ImportRecord)。
+    dry_run 時不檢查也不寫入匯入紀錄，回傳 (ImportResult, None)。
+    """
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    if dry_run:
+        result = process_excel_file(io.BytesIO(file_bytes), filename, selected_product_type,
+                                    upsert=upsert, dry_run=True, digest=digest)
+        return result, None
+
+    if not force:
+        previous = find_completed_import(digest, selected_product_type, upsert)
+        if previous:
+            return None, previous
+
+    record = ImportRecord(sha256=digest, file_size=len(file_bytes), filename=filename,
+                          product_type=selected_product_type, upsert=upsert)
+    try:
+        result = process_excel_file(io.BytesIO(file_bytes), filename, selected_product_type,
+                                    upsert=upsert, digest=digest)
+    except Exception:
+        db.session.rollback()
+        record.status = 'failed'
+        db.session.add(record)
+        db.session.commit()
+        raise
+
+    record.status = 'completed'
+    record.sheet_names = json.dumps(result.sheet_names, ensure_ascii=False)
+    record.case_count = result.case_count
+    record.imported_count = result.imported
+    record.updated_count = result.updated
+    db.session.add(record)
+    db.session.commit()
+    return result, record
@@ -0,0 +1,263 @@
+# similarity.py
+"""
+相似案例索引 (MinHash + LSH)。
+
+案例文字 (測試項目、目的、步驟、預期結果) 正規化後切成字元 n-gram，
+中文不需斷詞也能比對。每個案例計算 NUM_PERM 個 MinHash 值作為簽章，
+再切成 BANDS 段各自雜湊成 bucket_key；任一段相同的案例才會被當作候選，
+之後用簽章估算 Jaccard 相似度，不需要兩兩比對整個資料表。
+
+新增、編輯與匯入案例時會同步更新索引；既有資料可執行
+python build_similarity_index.py 重建。
+"""
+import re
+import zlib
+import hashlib
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import insert, delete
+
+from extensions import db
+from models import TestCase, CaseSignature, CaseLshBucket
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.6
+SIMILARITY_FIELDS = ('test_item', 'test_purpose', 'test_steps', 'expected_result')
+IN_CLAUSE_CHUNK_SIZE = 500
+# 同一批次內比對時，每個 bucket 只和最近加入的這麼多個案例比較
+MAX_BUCKET_COMPARISONS = 50
+
+_PRIME = (1 << 31) - 1
+_STEP_NUMBER = re.compile(r'(?m)^\s*\d+\s*[.、)]')
+_NON_WORD = re.compile(r'[\W_]+')
+_permutations = None
+
+
+def _get_permutations():
+    # numpy 只在實際計算簽章時才載入
+    import numpy as np
+
+    global _permutations
+    if _permutations is None:
+        rng = np.random.RandomState(1)
+        a = rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+        b = rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+        _permutations = (a[:, None], b[:, None])
+    return _permutations
+
+
+def _chunks(values):
+    values = list(values)
+    for i in range(0, len(values), IN_CLAUSE_CHUNK_SIZE):
+        yield values[i:i + IN_CLAUSE_CHUNK_SIZE]
+
+
+def case_text(parts):
+    """合併各欄位文字並正規化：去掉步驟編號、空白與標點，英文轉小寫。"""
+    text = '\n'.join(str(part) for part in parts if part)
+    text = _STEP_NUMBER.sub('', text)
+    return _NON_WORD.sub('', text.lower())
+
+
+def case_text_of(case):
+    return case_text(getattr(case, field) for field in SIMILARITY_FIELDS)
+
+
+def compute_signature(text):
+    """回傳 NUM_PERM 個 uint32 的 MinHash 簽章；沒有內容時回傳 None。"""
+    import numpy as np
+
+    if not text:
+        return None
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) % _PRIME for s in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    a, b = _get_permutations()
+    return ((a * hashes[None, :] + b) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def bucket_keys(signature):
+    keys = set()
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        keys.add(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def estimate_similarity(signature_a, signature_b):
+    return float((signature_a == signature_b).mean())
+
+
+def _threshold(threshold):
+    if threshold is not None:
+        return threshold
+    return current_app.config.get('SIMILARITY_THRESHOLD', DEFAULT_THRESHOLD)
+
+
+def store_signatures(signatures):
+    """以 {test_case.id: 簽章} 取代這些案例原本的索引資料。呼叫端負責 commit。"""
+    for chunk in _chunks(signatures):
+        db.session.execute(delete(CaseLshBucket).where(CaseLshBucket.test_case_id.in_(chunk)))
+        db.session.execute(delete(CaseSignature).where(CaseSignature.test_case_id.in_(chunk)))
+
+    signature_rows = []
+    bucket_rows = []
+    for case_id, signature in signatures.items():
+        if signature is None:
+            continue
+        signature_rows.append({'test_case_id': case_id, 'signature': signature.tobytes()})
+        bucket_rows.extend({'bucket_key': key, 'test_case_id': case_id} for key in bucket_keys(signature))
+    if signature_rows:
+        db.session.execute(insert(CaseSignature), signature_rows)
+        db.session.execute(insert(CaseLshBucket), bucket_rows)
+
+
+def index_cases(cases):
+    """重新計算並儲存案例的簽章 (新案例會先 flush 取得 id)。呼叫端負責 commit。"""
+    db.session.flush()
+    store_signatures({case.id: compute_signature(case_text_of(case)) for case in cases})
+
+
+def _load_signatures(case_ids):
+    import numpy as np
+
+    signatures = {}
+    for chunk in _chunks(case_ids):
+        for case_id, raw in (db.session.query(CaseSignature.test_case_id, CaseSignature.signature)
+                             .filter(CaseSignature.test_case_id.in_(chunk))):
+            signatures[case_id] = np.frombuffer(raw, dtype=np.uint32)
+    return signatures
+
+
+def _candidates(signatures):
+    """回傳 {label: 與其至少一個 band 相同的 test_case.id 集合}。"""
+    labels_by_key = defaultdict(set)
+    for label, signature in signatures.items():
+        for key in bucket_keys(signature):
+            labels_by_key[key].add(label)
+
+    candidates = defaultdict(set)
+    for chunk in _chunks(labels_by_key):
+        for key, case_id in (db.session.query(CaseLshBucket.bucket_key, CaseLshBucket.test_case_id)
+                             .filter(CaseLshBucket.bucket_key.in_(chunk))):
+            for label in labels_by_key[key]:
+                candidates[label].add(case_id)
+    return candidates
+
+
+def find_similar_cases(case, limit=10, threshold=None):
+    """回傳與案例相似的 [(TestCase, 相似度)]，依相似度由高到低排序。"""
+    threshold = _threshold(threshold)
+    signature = _load_signatures([case.id]).get(case.id)
+    if signature is None:
+        signature = compute_signature(case_text_of(case))
+    if signature is None:
+        return []
+
+    candidate_ids = _candidates({case.id: signature}).get(case.id, set()) - {case.id}
+    scored = []
+    for other_id, other_signature in _load_signatures(candidate_ids).items():
+        score = estimate_similarity(signature, other_signature)
+        if score >= threshold:
+            scored.append((score, other_id))
+    scored.sort(reverse=True)
+    scored = scored[:limit]
+
+    cases = {c.id: c for c in TestCase.query.filter(TestCase.id.in_([other_id for _, other_id in scored]))}
+    return [(cases[other_id], score) for score, other_id in scored if other_id in cases]
+
+
+def _best_match(signature, matrix):
+    """回傳 matrix (每列一個簽章) 中與 signature 最相似的列索引與估計的相似度。"""
+    scores = (matrix == signature).mean(axis=1)
+    index = int(scores.argmax())
+    return index, float(scores[index])
+
+
+def find_near_duplicates(signatures, threshold=None):
+    """
+    signatures 為 {Case ID: 簽章}，通常是一批即將匯入的案例。
+    每個案例回報資料庫或同一批次中最相似的一筆 (排除 Case ID 相同者)：
+    [(Case ID, 相似案例的 Case ID, 相似度)]。
+    """
+    import numpy as np
+
+    threshold = _threshold(threshold)
+    signatures = {label: signature for label, signature in signatures.items() if signature is not None}
+    if not signatures:
+        return []
+
+    best = {}
+
+    def consider(label, other_label, score):
+        if label != other_label and score >= threshold and score > best.get(label, (None, 0))[1]:
+            best[label] = (other_label, score)
+
+    # 與資料庫中既有案例比對：每個案例的候選簽章一次以矩陣比較
+    candidates = _candidates(signatures)
+    candidate_ids = set().union(*candidates.values()) if candidates else set()
+    existing_signatures = _load_signatures(candidate_ids)
+    existing_case_ids = {}
+    for chunk in _chunks(existing_signatures):
+        existing_case_ids.update(db.session.query(TestCase.id, TestCase.case_id).filter(TestCase.id.in_(chunk)))
+    existing_ids = [case_id for case_id in existing_signatures if case_id in existing_case_ids]
+    if existing_ids:
+        existing_matrix = np.stack([existing_signatures[case_id] for case_id in existing_ids])
+        row_of = {case_id: row for row, case_id in enumerate(existing_ids)}
+        for label, ids in candidates.items():
+            # 重新匯入 (upsert) 的案例會命中自己，先排除才不會蓋掉第二相似的案例
+            rows = [row_of[case_id] for case_id in ids
+                    if case_id in row_of and existing_case_ids[case_id] != label]
+            if rows:
+                index, score = _best_match(signatures[label], existing_matrix[rows])
+                consider(label, existing_case_ids[existing_ids[rows[index]]], score)
+
+    # 同一批次內互相比對：每個案例只和落在相同 bucket、排在它之前的案例比較。
+    # 大量近似重複的匯入會讓少數 bucket 變得很大，兩兩比對是 O(k²)；因此每個 bucket 只取
+    # 最近的 MAX_BUCKET_COMPARISONS 個案例，多個 bucket 的候選合併去重後再一次比較。
+    # 高度相似的案例幾乎落在所有相同的 bucket，仍會找到相似的案例 (但不一定是最相似的一筆)。
+    labels = list(signatures)
+    batch_matrix = np.stack([signatures[label] for label in labels])
+    positions_by_key = defaultdict(list)
+    for position, label in enumerate(labels):
+        earlier = set()
+        for key in bucket_keys(signatures[label]):
+            bucket = positions_by_key[key]
+            earlier.update(bucket[-MAX_BUCKET_COMPARISONS:])
+            bucket.append(position)
+        if earlier:
+            rows = sorted(earlier)
+            index, score = _best_match(signatures[label], batch_matrix[rows])
+            consider(label, labels[rows[index]], score)
+
+    return sorted(((label, other, round(score, 2)) for label, (other, score) in best.items()),
+                  key=lambda item: -item[2])
+
+
+def rebuild_index(batch_size=1000):
+    """清空並重建所有案例的索引，回傳處理的案例數。呼叫端負責 commit。"""
+    db.session.execute(delete(CaseLshBucket))
+    db.session.execute(delete(CaseSignature))
+
+    columns = [getattr(TestCase, field) for field in SIMILARITY_FIELDS]
+    last_id = 0
+    total = 0
+    while True:
+        rows = (db.session.query(TestCase.id, *columns)
+                .filter(TestCase.id > last_id)
+                .order_by(TestCase.id)
+                .limit(batch_size)
+                .all())
+        if not rows:
+            break
+        store_signatures({row.id: compute_signature(case_text(row[1:])) for row in rows})
+        last_id = rows[-1].id
+        total += len(rows)
+    return total
@@ -0,0 +1,75 @@
+# snapshot.py
+"""
+測試案例的欄式快照匯出 (Parquet / Arrow IPC)。
+
+以 yield_per 分批讀取案例，標籤由 tag_names 欄位拆成 list<string> 欄位儲存；
+每一批寫成一個 row group，記憶體用量與資料量無關。
+需要 pyarrow；未安裝時呼叫會拋出 RuntimeError。
+"""
+from sqlalchemy import select
+
+from extensions import db
+from models import TestCase
+from case_filters import apply_case_filters
+from workbook_cache import HAS_PYARROW
+
+SNAPSHOT_FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+DEFAULT_CHUNK_SIZE = 5000
+
+SNAPSHOT_COLUMNS = ['id', 'case_id', 'product_type', 'category', 'main_category', 'sub_category',
+                    'test_item', 'test_purpose', 'preconditions', 'test_steps', 'expected_result',
+                    'actual_result', 'status', 'notes', 'reference', 'version']
+
+
+def snapshot_schema():
+    import pyarrow as pa
+
+    fields = [pa.field('id', pa.int64(), nullable=False)]
+    fields += [pa.field(name, pa.string()) for name in SNAPSHOT_COLUMNS[1:-1]]
+    fields += [pa.field('version', pa.int64()), pa.field('tags', pa.list_(pa.string()))]
+    return pa.schema(fields)
+
+
+def _iter_batches(filters, chunk_size):
+    statement = (select(*[getattr(TestCase, name) for name in SNAPSHOT_COLUMNS], TestCase.tag_names)
+                 .order_by(TestCase.id))
+    if filters is not None:
+        statement = apply_case_filters(statement, filters)
+    result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+
+    for rows in result.partitions():
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(SNAPSHOT_COLUMNS)}
+        columns['tags'] = [row.tag_names.split(',') if row.tag_names else [] for row in rows]
+        yield columns
+
+
+def write_snapshot(sink, filters=None, fmt='parquet', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    將案例 (可套用 CaseFilters) 寫入 sink (檔案路徑或可寫入的二進位檔案物件)。
+    回傳寫入的案例數。
+    """
+    if not HAS_PYARROW:
+        raise RuntimeError('快照匯出需要安裝 pyarrow。')
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f'不支援的快照格式：{fmt}')
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = snapshot_schema()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+
+    total = 0
+    try:
+        for columns in _iter_batches(filters, chunk_size):
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            total += len(columns['id'])
+    finally:
+        writer.close()
+    return total
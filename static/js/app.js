@@ -0,0 +1,113 @@
+document.addEventListener('DOMContentLoaded', function () {
+    const body = document.body;
+
+    const toggleBtn = document.getElementById('toggle-sidebar-btn');
+    const pinBtn = document.getElementById('pin-sidebar-btn');
+    if (toggleBtn && pinBtn) {
+        const pinIcon = pinBtn.querySelector('i');
+        function updatePinIcon(isPinned) {
+            if (isPinned) {
+                pinIcon.classList.remove('bi-pin-angle'); pinIcon.classList.add('bi-pin-angle-fill');
+                pinBtn.classList.add('active');
+            } else {
+                pinIcon.classList.remove('bi-pin-angle-fill'); pinIcon.classList.add('bi-pin-angle');
+                pinBtn.classList.remove('active');
+            }
+        }
+        toggleBtn.addEventListener('click', () => {
+            if (!body.classList.contains('sidebar-pinned')) {
+                body.classList.toggle('sidebar-collapsed');
+                localStorage.setItem('sidebarCollapsed', body.classList.contains('sidebar-collapsed'));
+            }
+        });
+        pinBtn.addEventListener('click', () => {
+            const isPinned = body.classList.toggle('sidebar-pinned');
+            localStorage.setItem('sidebarPinned', isPinned);
+            updatePinIcon(isPinned);
+            if (isPinned) {
+                body.classList.remove('sidebar-collapsed');
+                localStorage.setItem('sidebarCollapsed', 'false');
+            }
+        });
+        const isPinnedOnLoad = localStorage.getItem('sidebarPinned') === 'true';
+        if (isPinnedOnLoad) body.classList.add('sidebar-pinned');
+        updatePinIcon(isPinnedOnLoad);
+        const isCollapsedOnLoad = localStorage.getItem('sidebarCollapsed') === 'true';
+        if (isCollapsedOnLoad && !isPinnedOnLoad) body.classList.add('sidebar-collapsed');
+    }
+
+    document.querySelectorAll('.tree-nav .parent > a').forEach(item => {
+        item.addEventListener('click', event => {
+            event.preventDefault(); 
+            item.parentElement.classList.toggle('open');
+        });
+    });
+
+    const table = document.querySelector('table');
+    if(table) {
+        table.addEventListener('click', function(event) {
+            const expandableRow = event.target.closest('.expandable-row');
+            if (!expandableRow) return;
+
+            if (event.target.closest('a, button, input, select, textarea, .dropdown, [hx-get], [hx-post]')) {
+                return; 
+            }
+
+            const targetId = expandableRow.dataset.bsTarget;
+            const collapseElement = document.querySelector(targetId);
+            if (collapseElement) {
+                const bsCollapse = bootstrap.Collapse.getOrCreateInstance(collapseElement);
+                bsCollapse.toggle();
+            }
+        });
+    }
+});
+
+// --- Live updates ---
+// 每隔 intervalSeconds 秒向 /events 取得 cursor 之後的案例變動並交給 onChanges；分頁在背景時暫停。
+// 伺服器已不保留 cursor 之後的紀錄時呼叫 onResync，由頁面重新讀取目前的資料，
+// onResync 可回傳 (Promise 的) 新 cursor，讓之後的變動不會重複套用。
+function pollLiveUpdates(options) {
+    let cursor = options.cursor;
+    let timer = null;
+    let running = false;
+
+    function schedule(delay) {
+        if (timer === null && !running) {
+            timer = setTimeout(poll, delay);
+        }
+    }
+
+    async function poll() {
+        timer = null;
+        if (document.hidden) { return; }
+        running = true;
+        let delay = options.intervalSeconds * 1000;
+        try {
+            const url = new URL(options.url, window.location.href);
+            url.searchParams.set('after', cursor);
+            const response = await fetch(url, { headers: { 'Accept': 'application/json' } });
+            if (response.ok) {
+                const data = await response.json();
+                if (data.resync) {
+                    const resyncCursor = await options.onResync();
+                    cursor = resyncCursor !== undefined ? resyncCursor : data.cursor;
+                } else {
+                    if (data.changes.length) { options.onChanges(data.changes); }
+                    cursor = data.cursor;
+                }
+                if (data.more) { delay = 0; }
+            }
+        } catch (e) {
+            console.error('即時更新失敗:', e);
+        } finally {
+            running = false;
+        }
+        schedule(delay);
+    }
+
+    document.addEventListener('visibilitychange', function() {
+        if (!document.hidden) { schedule(0); }
+    });
+    schedule(options.intervalSeconds * 1000);
+}
@@ -0,0 +1,261 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // 需要由伺服器產生的網址放在頁面上的 #cases-page-config (JSON)
+    const config = JSON.parse(document.getElementById('cases-page-config').textContent);
+
+    // --- Live updates ---
+    // 其他人修改狀態時，只重新載入本頁上對應案例的狀態欄位 (正在編輯中的欄位不動)
+    const refreshStatus = function(caseId) {
+        const wrapper = document.getElementById('status-result-wrapper-' + caseId);
+        if (!wrapper || wrapper.querySelector('form')) { return; }
+        htmx.ajax('GET', config.statusUrl.replace(/0$/, caseId), { target: wrapper, swap: 'innerHTML' });
+    };
+    pollLiveUpdates({
+        url: config.liveEventsUrl,
+        cursor: config.liveCursor,
+        intervalSeconds: config.livePollSeconds,
+        onChanges: function(changes) {
+            changes.forEach(function(change) {
+                if (change.status[1] !== null) { refreshStatus(change.id); }
+            });
+        },
+        // 遺漏的變動無法補齊時，重新讀取本頁所有案例的狀態欄位
+        onResync: function() {
+            document.querySelectorAll('[id^="status-result-wrapper-"]').forEach(function(wrapper) {
+                refreshStatus(wrapper.id.replace('status-result-wrapper-', ''));
+            });
+        }
+    });
+
+    // --- Helper function to introduce a small delay ---
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    // --- Single row expansion/collapse logic ---
+    const tableBody = document.getElementById('case-table-body');
+    if (tableBody) {
+        tableBody.addEventListener('click', function(e) {
+            const interactiveElement = e.target.closest(
+                'a, button, input, select, textarea, .dropdown, .case-checkbox, .tag-item, .editable-section'
+            );
+            if (interactiveElement) {
+                return;
+            }
+
+            const expandableRow = e.target.closest('.expandable-row');
+            if (expandableRow) {
+                const targetId = expandableRow.dataset.bsTarget;
+                const collapseElement = document.querySelector(targetId);
+
+                if (collapseElement) {
+                    const bsCollapse = bootstrap.Collapse.getOrCreateInstance(collapseElement);
+                    bsCollapse.toggle();
+
+                    const detailsContent = document.querySelector(targetId + ' > td');
+                    if (!detailsContent.hasAttribute('data-loaded')) {
+                        const caseId = expandableRow.dataset.caseId;
+                        const detailUrl = config.detailUrl.replace('0', caseId);
+
+                        htmx.ajax('GET', detailUrl, { target: detailsContent, swap: 'innerHTML' }).then(() => {
+                            detailsContent.setAttribute('data-loaded', 'true');
+                        });
+                    }
+                }
+            }
+        });
+    }
+
+    // --- Smart search logic ---
+    const tagAutocompleteUrl = config.tagAutocompleteUrl;
+    $('#smart-search-select').select2({
+        tags: true,
+        placeholder: '輸入條件後按 Enter 或空白鍵建立區塊...',
+        tokenSeparators: [' ', ','],
+        // 只有以 # 或 tag: 開頭的輸入才查詢標籤
+        ajax: {
+            url: tagAutocompleteUrl,
+            delay: 200,
+            data: function(params) {
+                const term = params.term || '';
+                return /^(#|tag:)/.test(term) ? { q: term.replace(/^(#|tag:)/, '') } : null;
+            },
+            transport: function(params, success, failure) {
+                if (!params.data) {
+                    success({ results: [] });
+                    return { abort: function() {} };
+                }
+                return $.ajax(params).then(success).fail(failure);
+            },
+            processResults: function(data) {
+                return {
+                    results: data.results.map(function(tag) {
+                        return { id: '#' + tag.id, text: '#' + tag.text + ' (' + tag.count + ')' };
+                    })
+                };
+            }
+        }
+    });
+    const searchBtn = document.getElementById('smart-search-btn');
+    if (searchBtn) {
+        const performSearch = function() {
+            const selectedData = $('#smart-search-select').val();
+            const queryString = selectedData ? selectedData.join(' ') : '';
+            const currentUrl = new URL(window.location.href);
+            if (queryString) {
+                currentUrl.searchParams.set('q', queryString);
+            } else {
+                currentUrl.searchParams.delete('q');
+            }
+            currentUrl.searchParams.set('page', '1'); // Reset to first page on new search
+            window.location.href = currentUrl.href;
+        };
+        searchBtn.addEventListener('click', performSearch);
+        $('#smart-search-select').next('.select2-container').on('keyup', function(event) {
+            if (event.key === 'Enter') {
+                setTimeout(performSearch, 50);
+            }
+        });
+    }
+
+    // --- Bulk actions logic (Tags & Delete) ---
+    // ▼▼▼ 核心修改處：移除 tokenSeparators 中的空格 ▼▼▼
+    $('#bulk-tag-select').select2({ 
+        placeholder: '選擇或輸入新標籤...', 
+        tags: true, 
+        tokenSeparators: [','],
+        ajax: {
+            url: tagAutocompleteUrl,
+            delay: 200,
+            data: function(params) { return { q: params.term || '' }; },
+            processResults: function(data) {
+                return {
+                    results: data.results.map(function(tag) {
+                        return { id: tag.id, text: tag.text + ' (' + tag.count + ')' };
+                    })
+                };
+            }
+        }
+    });
+    // ▲▲▲ 修改結束 ▲▲▲
+    const bulkForm = document.getElementById('bulk-action-form');
+    const addTagBtn = document.getElementById('bulk-add-tag-btn');
+    const deleteBtn = document.getElementById('bulk-delete-btn');
+    if (bulkForm && addTagBtn && deleteBtn) {
+        addTagBtn.addEventListener('click', function() {
+            const tagValue = $('#bulk-tag-select').val();
+            if (!tagValue) { alert('請選擇或輸入要新增的標籤！'); return; }
+            let hiddenInput = bulkForm.querySelector('input[name="new_tag"]');
+            if (!hiddenInput) {
+                hiddenInput = document.createElement('input');
+                hiddenInput.type = 'hidden';
+                hiddenInput.name = 'new_tag';
+                bulkForm.appendChild(hiddenInput);
+            }
+            hiddenInput.value = tagValue;
+            bulkForm.action = config.bulkAddTagUrl;
+            bulkForm.submit();
+        });
+
+        deleteBtn.addEventListener('click', function() {
+            const checkedBoxes = bulkForm.querySelectorAll('input[name="case_ids"]:checked');
+            if (checkedBoxes.length === 0) {
+                alert('請至少選擇一個要刪除的案例！');
+                return;
+            }
+            if (confirm('您確定要刪除所選的 ' + checkedBoxes.length + ' 個案例嗎？此操作無法復原。')) {
+                bulkForm.action = config.bulkDeleteUrl;
+                bulkForm.submit();
+            }
+        });
+    }
+
+    // --- Per page selection logic ---
+    const perPageSelect = document.getElementById('per-page-select');
+    if (perPageSelect) {
+        perPageSelect.addEventListener('change', function() {
+            const perPage = this.value;
+            const currentUrl = new URL(window.location.href);
+            currentUrl.searchParams.set('per_page', perPage);
+            currentUrl.searchParams.set('page', '1'); // Reset to first page
+            window.location.href = currentUrl.href;
+        });
+    }
+
+    // --- Select all checkbox logic ---
+    const selectAllCheckbox = document.getElementById('select-all-checkbox');
+    if (selectAllCheckbox) {
+        selectAllCheckbox.addEventListener('click', function(event) {
+            document.querySelectorAll('.case-checkbox').forEach(function(checkbox) {
+                checkbox.checked = event.target.checked;
+            });
+        });
+    }
+
+    // --- "Toggle All" expand/collapse logic ---
+    const toggleAllBtn = document.getElementById('toggle-all-btn');
+    if (toggleAllBtn) {
+        // Use an async function to allow for 'await'
+        toggleAllBtn.addEventListener('click', async function() {
+            const button = this;
+            const isCollapsed = button.dataset.state === 'collapsed';
+            const action = isCollapsed ? 'show' : 'hide';
+            const expandableRows = document.querySelectorAll('.expandable-row');
+
+            button.disabled = true;
+            const originalText = button.querySelector('span').textContent;
+            button.querySelector('span').textContent = '處理中...';
+
+            if (action === 'show') {
+                for (const row of expandableRows) {
+                    const targetId = row.dataset.bsTarget;
+                    const collapseElement = document.querySelector(targetId);
+                    const detailsContent = document.querySelector(targetId + ' > td');
+
+                    if (collapseElement && detailsContent) {
+                        if (!detailsContent.hasAttribute('data-loaded')) {
+                            const caseId = row.dataset.caseId;
+                            const detailUrl = config.detailUrl.replace('0', caseId);
+                            await htmx.ajax('GET', detailUrl, { target: detailsContent, swap: 'innerHTML' });
+                            detailsContent.setAttribute('data-loaded', 'true');
+                        }
+                        const bsCollapse = bootstrap.Collapse.getOrCreateInstance(collapseElement);
+                        bsCollapse.show();
+                        await sleep(20);
+                    }
+                }
+            } else { // action === 'hide'
+                for (const row of expandableRows) {
+                    const targetId = row.dataset.bsTarget;
+                    const collapseElement = document.querySelector(targetId);
+                    if (collapseElement) {
+                        const bsCollapse = bootstrap.Collapse.getOrCreateInstance(collapseElement);
+                        bsCollapse.hide();
+                    }
+                }
+                await sleep(50);
+            }
+
+            // --- Update button state and re-enable it ---
+            const icon = button.querySelector('i');
+            const text = button.querySelector('span');
+            button.dataset.state = isCollapsed ? 'expanded' : 'collapsed';
+            
+            if (isCollapsed) {
+                icon.classList.remove('bi-arrows-expand');
+                icon.classList.add('bi-arrows-collapse');
+                text.textContent = '全部收合';
+            } else {
+                icon.classList.remove('bi-arrows-collapse');
+                icon.classList.add('bi-arrows-expand');
+                text.textContent = '全部展開';
+            }
+            button.disabled = false;
+        });
+    }
+
+    // --- Popover initialization ---
+    var popoverTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="popover"]'));
+    var popoverList = popoverTriggerList.map(function (popoverTriggerEl) {
+      return new bootstrap.Popover(popoverTriggerEl)
+    });
+});
@@ -0,0 +1,8 @@
+// 搜尋結果：點擊表格列時前往 data-href 指定的案例列表
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.clickable-row').forEach(row => {
+        row.addEventListener('click', () => {
+            window.location.href = row.dataset.href;
+        });
+    });
+});
@@ -0,0 +1,80 @@
+# storage_maintenance.py
+"""
+附件目錄的維護作業。
+
+    python storage_maintenance.py gc              # 隔離孤兒檔案、清除過期的隔離檔案、回填檔案大小
+    python storage_maintenance.py gc --dry-run    # 只統計，不搬移或刪除任何檔案
+    python storage_maintenance.py report --top 10 # 依產品與案例統計附件容量
+
+限速、寬限期與隔離天數等設定見 attachment_storage.py。
+"""
+import time
+import argparse
+
+from app import create_app
+from attachment_storage import collect_garbage, storage_report
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+
+
+def run_gc(app, dry_run, max_files_per_second):
+    if max_files_per_second is not None:
+        app.config['ATTACHMENT_GC_MAX_FILES_PER_SECOND'] = max_files_per_second
+    with app.app_context():
+        start = time.perf_counter()
+        result = collect_garbage(dry_run=dry_run)
+    if result is None:
+        print("已有其他行程正在執行回收作業，略過。")
+        return
+
+    prefix = "[試執行] " if dry_run else ""
+    print(f"{prefix}掃描 {result.scanned} 個檔案，耗時 {time.perf_counter() - start:.1f} 秒。")
+    print(f"{prefix}隔離孤兒檔案 {result.quarantined} 個 ({_format_bytes(result.quarantined_bytes)})。")
+    print(f"{prefix}清除過期的隔離檔案 {result.purged} 個 ({_format_bytes(result.purged_bytes)})。")
+    if result.restored:
+        print(f"{prefix}隔離中的檔案仍被引用，移回附件目錄 {result.restored} 個。")
+    print(f"{prefix}回填檔案大小 {result.sizes_updated} 筆。")
+    if result.missing:
+        print(f"警告：{result.missing} 筆附件的檔案已不存在。")
+
+
+def run_report(app, top):
+    with app.app_context():
+        report = storage_report(top)
+    print(f"附件共 {report.total_files} 個，{_format_bytes(report.total_bytes)}。")
+    if report.unknown_size:
+        print(f"其中 {report.unknown_size} 個尚未記錄大小，請先執行 gc。")
+    print(f"隔離目錄：{report.quarantine_files} 個檔案，{_format_bytes(report.quarantine_bytes)}。")
+
+    print("\n依產品：")
+    for product, files, size in report.by_product:
+        print(f"  {product}: {files} 個，{_format_bytes(size)}")
+    print(f"\n用量最大的 {len(report.by_case)} 個案例：")
+    for _, case_id, product, files, size in report.by_case:
+        print(f"  {case_id} [{product}]: {files} 個，{_format_bytes(size)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='附件目錄的維護作業')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    gc_parser = subparsers.add_parser('gc', help='回收孤兒附件並回填檔案大小')
+    gc_parser.add_argument('--dry-run', action='store_true', help='只統計，不搬移或刪除檔案')
+    gc_parser.add_argument('--max-files-per-second', type=int, help='每秒最多處理的檔案數，0 為不限速')
+    report_parser = subparsers.add_parser('report', help='統計附件容量')
+    report_parser.add_argument('--top', type=int, default=20, help='列出用量最大的幾個案例')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.command == 'gc':
+        run_gc(app, args.dry_run, args.max_files_per_second)
+    else:
+        run_report(app, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# stress_sqlite.py
+"""
+多行程 SQLite 壓力測試：模擬多個 gunicorn worker 同時讀寫同一個資料庫，
+統計是否出現 "database is locked" 錯誤。
+
+用法：
+    python stress_sqlite.py --workers 4 --rate 50 --duration 20
+
+預設會複製 instance/testcases.db 到暫存目錄、以 flask db upgrade 升級到最新的 schema 後再測試，
+不會動到正式資料。任何請求失敗 (不只是鎖定錯誤) 時以非 0 結束。
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def worker(worker_index, database_url, rate, duration, write_ratio, result_queue):
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app
+    from models import TestCase
+    from db_concurrency import is_lock_error
+
+    app = create_app({'PROPAGATE_EXCEPTIONS': True})
+    client = app.test_client()
+    with app.app_context():
+        case_ids = [row.id for row in TestCase.query.with_entities(TestCase.id).all()]
+    statuses = ['未執行', '進行中', '通過', '失敗']
+
+    rng = random.Random(worker_index)
+    stats = {'requests': 0, 'writes': 0, 'lock_errors': 0, 'other_errors': 0, 'latencies': []}
+    interval = 1.0 / rate if rate > 0 else 0
+    deadline = time.monotonic() + duration
+    next_tick = time.monotonic()
+
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            if case_ids and rng.random() < write_ratio:
+                case_id = rng.choice(case_ids)
+                response = client.post(f'/edit-status-result/{case_id}', data={
+                    'status': rng.choice(statuses),
+                    'actual_result': f'stress worker {worker_index}',
+                })
+                stats['writes'] += 1
+            else:
+                response = client.get('/', query_string={'page': rng.randint(1, 5)})
+            if response.status_code >= 500:
+                stats['other_errors'] += 1
+        except Exception as e:
+            if is_lock_error(e):
+                stats['lock_errors'] += 1
+            else:
+                stats['other_errors'] += 1
+        stats['requests'] += 1
+        stats['latencies'].append(time.perf_counter() - start)
+
+        next_tick += interval
+        sleep_for = next_tick - time.monotonic()
+        if sleep_for > 0:
+            time.sleep(sleep_for)
+
+    result_queue.put(stats)
+
+
+def upgrade_database(database_url):
+    """把複製出來的資料庫升級到最新的遷移版本 (等同 flask db upgrade)。"""
+    os.environ['DATABASE_URL'] = database_url
+    from flask_migrate import upgrade
+    from app import create_app
+    from extensions import db
+
+    app = create_app()
+    with app.app_context():
+        upgrade(directory=os.path.join(BASE_DIR, 'migrations'))
+        # 子行程各自建立連線，不沿用父行程的連線池
+        db.engine.dispose()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 多行程壓力測試')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=25, help='每個 worker 每秒請求數')
+    parser.add_argument('--duration', type=float, default=15, help='秒')
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--database', default=os.path.join(BASE_DIR, 'instance', 'testcases.db'),
+                        help='來源資料庫，會先複製一份再測試')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='stress_sqlite_')
+    db_copy = os.path.join(tmp_dir, 'testcases.db')
+    shutil.copyfile(args.database, db_copy)
+    database_url = f'sqlite:///{db_copy}'
+    try:
+        upgrade_database(database_url)
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"錯誤：無法將資料庫副本升級到最新版本：{e}")
+        sys.exit(1)
+
+    result_queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(i, database_url, args.rate, args.duration,
+                                                     args.write_ratio, result_queue))
+        for i in range(args.workers)
+    ]
+    for p in processes:
+        p.start()
+    results = [result_queue.get() for _ in processes]
+    for p in processes:
+        p.join()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    latencies = [lat for r in results for lat in r['latencies']]
+    summary = {
+        'workers': args.workers,
+        'target_rate': args.rate * args.workers,
+        'achieved_rate': round(sum(r['requests'] for r in results) / args.duration, 1),
+        'requests': sum(r['requests'] for r in results),
+        'writes': sum(r['writes'] for r in results),
+        'lock_errors': sum(r['lock_errors'] for r in results),
+        'other_errors': sum(r['other_errors'] for r in results),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    failed = summary['lock_errors'] + summary['other_errors']
+    if failed:
+        print(f"失敗：{failed} / {summary['requests']} 個請求發生錯誤。")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
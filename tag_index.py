@@ -0,0 +1,96 @@
+# tag_index.py
+"""
+標籤自動完成用的記憶體索引。
+
+依名稱排序保存所有標籤與其使用次數，以二分搜尋找出符合前綴的標籤，
+再依使用次數排序。列表頁不再一次嵌入所有標籤，改由 select2 遠端查詢。
+
+本行程內有標籤異動 (新增/刪除標籤、案例增減標籤、刪除案例) 並 commit 後
+會立即失效重建；其他 worker 的異動則在 TAG_INDEX_TTL 秒後才會反映。
+"""
+import time
+import bisect
+import threading
+from sqlalchemy import event, func, inspect
+
+from extensions import db
+from models import Tag, TestCase, test_case_tags
+
+
+class TagIndex:
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._names = []
+        self._counts = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault('TAG_INDEX_TTL', self.ttl)
+        app.extensions['tag_index'] = self
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            rows = (db.session.query(Tag.name, func.count(test_case_tags.c.test_case_id))
+                    .outerjoin(test_case_tags, test_case_tags.c.tag_id == Tag.id)
+                    .group_by(Tag.id)
+                    .all())
+            self._counts = {name: count for name, count in rows}
+            self._names = sorted(self._counts)
+            self._loaded_at = time.monotonic()
+
+    def search(self, prefix='', limit=20):
+        """回傳 [(名稱, 使用次數)]，依使用次數由多到少、名稱排序。"""
+        self._ensure_loaded()
+        prefix = prefix.strip().lower()
+        names, counts = self._names, self._counts
+
+        start = bisect.bisect_left(names, prefix)
+        matches = []
+        for name in names[start:]:
+            if not name.startswith(prefix):
+                break
+            matches.append((name, counts[name]))
+
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        return matches[:limit]
+
+
+tag_index = TagIndex()
+
+
+def _touches_tags(session):
+    for obj in session.new:
+        if isinstance(obj, Tag) or (isinstance(obj, TestCase) and obj.tags):
+            return True
+    for obj in session.deleted:
+        if isinstance(obj, (Tag, TestCase)):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, TestCase) and inspect(obj).attrs.tags.history.has_changes():
+            return True
+    return False
+
+
+@event.listens_for(db.session, 'before_flush')
+def _mark_tag_changes(session, flush_context, instances):
+    if not session.info.get('tag_index_dirty') and _touches_tags(session):
+        session.info['tag_index_dirty'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('tag_index_dirty', False):
+        tag_index.invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('tag_index_dirty', None)
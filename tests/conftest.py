@@ -0,0 +1,55 @@
+# tests/conftest.py
+import io
+import shutil
+
+import pytest
+
+from app import BASE_DIR, create_app
+from extensions import db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """每個測試使用獨立的 SQLite 檔案、活頁簿快取與分類規則副本。"""
+    rules_path = tmp_path / 'category_rules.json'
+    shutil.copy(f'{BASE_DIR}/category_rules.json', rules_path)
+    # 匯入會把前置條件寫回規則檔，不能動到專案裡的檔案
+    monkeypatch.setenv('CATEGORY_RULES_PATH', str(rules_path))
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'ATTACHMENT_FOLDER': str(tmp_path / 'uploads' / 'attachments'),
+        'WORKBOOK_CACHE_DIR': str(tmp_path / 'workbook_cache'),
+        'DB_WRITE_LOCK_PATH': str(tmp_path / 'db-write.lock'),
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def make_workbook():
+    """
+    建立測試用的 Excel 檔案，回傳檔案內容 (bytes)。
+    rows 為 {欄位標頭: 值} 的 list；第一列放全域前置條件，第二列為標頭。
+    """
+    from openpyxl import Workbook
+
+    def build(rows, preconditions='全域前置條件'):
+        headers = ['Case ID', '測試項目', '測試目的', '前置條件', '測試步驟', '預期結果', '參考資料', '標籤']
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = 'Cases'
+        sheet.append([preconditions])
+        sheet.append(headers)
+        for row in rows:
+            sheet.append([row.get(header, '') for header in headers])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+
+    return build
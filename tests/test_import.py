@@ -0,0 +1,120 @@
+# tests/test_import.py
+import io
+
+from extensions import db
+# 以別名匯入，避免 pytest 把 TestCase 模型當成測試類別收集
+from models import ImportRecord, TestCase as Case
+from services import process_excel_file, import_uploaded_file
+
+PRODUCT = 'Smail'
+
+ROWS = [
+    {'Case ID': 'TC-001', '測試項目': '登入成功', '測試步驟': '輸入正確密碼', '預期結果': '進入收件匣'},
+    {'Case ID': 'TC-002', '測試項目': '登入失敗', '測試步驟': '輸入錯誤密碼', '預期結果': '顯示錯誤訊息'},
+]
+
+
+def changed_rows():
+    rows = [dict(row) for row in ROWS]
+    rows[1]['預期結果'] = '顯示錯誤訊息並清空密碼'
+    return rows
+
+
+def import_file(file_bytes, **kwargs):
+    return process_excel_file(io.BytesIO(file_bytes), 'cases.xlsx', PRODUCT, **kwargs)
+
+
+def snapshot():
+    return sorted((case.case_id, case.expected_result, case.status, case.content_hash, case.version)
+                  for case in Case.query.all())
+
+
+def test_upsert_updates_only_rows_whose_content_changed(app, make_workbook):
+    import_file(make_workbook(ROWS))
+    kept = Case.query.filter_by(case_id='TC-001').one()
+    kept.status = '通過'
+    db.session.commit()
+    version_before = kept.version
+
+    result = import_file(make_workbook(changed_rows()), upsert=True)
+
+    assert (result.imported, result.updated, result.unchanged, result.case_count) == (0, 1, 1, 2)
+    updated = Case.query.filter_by(case_id='TC-002').one()
+    assert updated.expected_result == '顯示錯誤訊息並清空密碼'
+    # 內容沒有變動的案例不會被寫入，手動設定的狀態也保留
+    kept = Case.query.filter_by(case_id='TC-001').one()
+    assert kept.status == '通過'
+    assert kept.version == version_before
+
+
+def test_import_without_upsert_skips_existing_cases(app, make_workbook):
+    import_file(make_workbook(ROWS))
+    before = snapshot()
+
+    result = import_file(make_workbook(changed_rows()))
+
+    assert (result.imported, result.updated, result.unchanged) == (0, 0, 0)
+    assert snapshot() == before
+
+
+def test_forced_reimport_of_identical_file_changes_nothing(app, make_workbook):
+    file_bytes = make_workbook(ROWS)
+    import_uploaded_file(file_bytes, 'cases.xlsx', PRODUCT, upsert=True)
+    before = snapshot()
+
+    result, record = import_uploaded_file(file_bytes, 'cases.xlsx', PRODUCT, upsert=True, force=True)
+
+    # force 只跳過匯入紀錄的檢查，內容雜湊相同的案例仍然不會更新
+    assert (result.imported, result.updated, result.unchanged) == (0, 0, 2)
+    assert record.status == 'completed'
+    assert snapshot() == before
+    assert ImportRecord.query.count() == 2
+
+
+def test_dry_run_leaves_database_untouched(app, make_workbook):
+    result, record = import_uploaded_file(make_workbook(ROWS), 'cases.xlsx', PRODUCT, dry_run=True)
+
+    assert record is None
+    assert (result.imported, result.case_count) == (2, 2)
+    assert Case.query.count() == 0
+    assert ImportRecord.query.count() == 0
+
+    import_file(make_workbook(ROWS))
+    before = snapshot()
+
+    result, record = import_uploaded_file(make_workbook(changed_rows()), 'cases.xlsx', PRODUCT,
+                                          upsert=True, dry_run=True)
+
+    assert record is None
+    assert (result.imported, result.updated, result.unchanged) == (0, 1, 1)
+    assert snapshot() == before
+    assert ImportRecord.query.count() == 0
+
+
+def test_already_imported_file_is_skipped_before_parsing(app, make_workbook, monkeypatch):
+    file_bytes = make_workbook(ROWS)
+    result, first = import_uploaded_file(file_bytes, 'cases.xlsx', PRODUCT)
+    assert result.imported == 2
+
+    def fail(*args, **kwargs):
+        raise AssertionError('已匯入過的檔案不應再解析')
+    monkeypatch.setattr('services.process_excel_file', fail)
+
+    result, previous = import_uploaded_file(file_bytes, 'renamed.xlsx', PRODUCT)
+
+    assert result is None
+    assert previous.id == first.id
+    assert ImportRecord.query.count() == 1
+
+
+def test_upsert_is_not_skipped_by_a_plain_import_record(app, make_workbook):
+    file_bytes = make_workbook(ROWS)
+    import_uploaded_file(file_bytes, 'cases.xlsx', PRODUCT)
+
+    # 先前的紀錄不是 upsert，無法確定已存在的案例都已同步，所以仍要處理
+    result, record = import_uploaded_file(file_bytes, 'cases.xlsx', PRODUCT, upsert=True)
+
+    assert result is not None
+    assert (result.updated, result.unchanged) == (0, 2)
+    assert record.upsert is True
+    assert ImportRecord.query.count() == 2
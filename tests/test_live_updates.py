@@ -0,0 +1,59 @@
+# tests/test_live_updates.py
+import io
+import json
+
+import live_updates
+from extensions import db
+from live_updates import change_feed
+# 以別名匯入，避免 pytest 把 TestCase 模型當成測試類別收集
+from models import CaseChange, TestCase as Case
+from services import process_excel_file
+
+ROWS = [{'Case ID': f'TC-{i:03d}', '測試項目': f'項目 {i}'} for i in range(5)]
+
+
+def payloads():
+    return [json.loads(change.payload) for change in CaseChange.query.order_by(CaseChange.id)]
+
+
+def test_import_writes_one_record_per_transaction(app, make_workbook):
+    # 匯入時 process_tags 每列都會 flush，但整個匯入只寫入一筆紀錄
+    process_excel_file(io.BytesIO(make_workbook(ROWS)), 'cases.xlsx', 'Smail')
+
+    records = payloads()
+    assert len(records) == 1
+    assert sorted(change['id'] for change in records[0]) == sorted(case.id for case in Case.query)
+
+    changes, cursor, more, resync = change_feed.changes_since(0)
+    assert (len(changes), cursor, more, resync) == (5, CaseChange.query.one().id, False, False)
+
+
+def test_changes_are_merged_and_rolled_back_with_the_transaction(app, make_workbook):
+    process_excel_file(io.BytesIO(make_workbook(ROWS)), 'cases.xlsx', 'Smail')
+    case = Case.query.filter_by(case_id='TC-000').one()
+
+    case.status = '進行中'
+    db.session.flush()
+    case.status = '通過'
+    db.session.commit()
+    assert payloads()[-1] == [{'id': case.id, 'status': ['未執行', '通過'],
+                               'category': [case.main_category, case.main_category]}]
+
+    # 改回原值的變動不會記錄
+    case.status = '失敗'
+    db.session.flush()
+    case.status = '通過'
+    db.session.commit()
+    case.status = '失敗'
+    db.session.flush()
+    db.session.rollback()
+    assert len(payloads()) == 2
+
+
+def test_large_transaction_records_a_resync(app, make_workbook, monkeypatch):
+    monkeypatch.setattr(live_updates, 'MAX_CHANGES_PER_RECORD', 3)
+    process_excel_file(io.BytesIO(make_workbook(ROWS)), 'cases.xlsx', 'Smail')
+
+    assert payloads() == [None]
+    changes, cursor, more, resync = change_feed.changes_since(0)
+    assert (changes, resync) == ([], True)
@@ -0,0 +1,88 @@
+# tests/test_rule_impact.py
+import os
+import json
+import random
+
+import pytest
+
+from extensions import db
+# 以別名匯入，避免 pytest 把 TestCase 模型當成測試類別收集
+from models import TestCase as Case
+from rule_impact import RuleIndex
+from utils import categorize_case, case_data_from_case
+
+ALPHABET = '登入出帳號密碼口Aa '
+
+
+def random_text(rng):
+    if rng.random() < 0.1:
+        return None
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12)))
+
+
+def random_keywords(rng):
+    return [''.join(rng.choice(ALPHABET.strip()) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 3))]
+
+
+def random_rules(rng):
+    rules = {
+        'P1': [{'keywords': random_keywords(rng), 'main_category': f'主分類{i}', 'sub_category': f'子分類{i}'}
+               for i in range(rng.randint(1, 5))],
+        'P2': random_keywords(rng),
+    }
+    if rng.random() < 0.5:
+        rules['P3'] = [{'keywords': random_keywords(rng), 'main_category': '主分類', 'sub_category': '子分類'}]
+    return rules
+
+
+def brute_force_moves(current_rules, proposed_rules):
+    """對每個案例以 categorize_case 分別套用兩組規則 (與 fix_categories.py 相同的方式)。"""
+    rules_path = os.environ['CATEGORY_RULES_PATH']
+
+    def categorize_all(rules):
+        with open(rules_path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f, ensure_ascii=False)
+        return {case.id: categorize_case(case_data_from_case(case), case.product_type)
+                for case in Case.query.filter(Case.product_type.in_(list(proposed_rules)))}
+
+    current = categorize_all(current_rules)
+    proposed = categorize_all(proposed_rules)
+    return {(case_id, current[case_id], proposed[case_id]) for case_id in current
+            if current[case_id] != proposed[case_id]}
+
+
+@pytest.fixture
+def random_cases(app):
+    rng = random.Random(44)
+    for i in range(300):
+        db.session.add(Case(case_id=f'TC-{i:03d}', product_type=rng.choice(['P1', 'P2', 'P3']),
+                            category=random_text(rng) or '', test_item=random_text(rng) or '',
+                            test_steps=random_text(rng), main_category='舊分類', sub_category='舊子分類'))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_preview_matches_brute_force_recategorization(app, random_cases, seed):
+    rng = random.Random(seed)
+    current_rules, proposed_rules = random_rules(rng), random_rules(rng)
+
+    impact = RuleIndex(ttl=0).preview(proposed_rules, current_rules)
+
+    assert {(move.id, move.old, move.new) for move in impact.moves} == \
+        brute_force_moves(current_rules, proposed_rules)
+    assert impact.case_count == Case.query.filter(Case.product_type.in_(list(proposed_rules))).count()
+
+
+def test_keyword_needs_to_appear_as_a_substring(app):
+    # 「登入口」的 bigram (登入、入口) 都在文字中，但並不是子字串
+    db.session.add(Case(case_id='TC-1', product_type='P1', category='', test_item='登入 入口'))
+    db.session.add(Case(case_id='TC-2', product_type='P1', category='', test_item='LOGIN 登入口'))
+    db.session.commit()
+    index = RuleIndex(ttl=0)
+    index.preview({'P1': ['帳號']}, {'P1': ['帳號']})
+
+    ids = {case.case_id: case.id for case in Case.query}
+    assert index.match('登入口') == {ids['TC-2']}
+    assert index.match('Login') == {ids['TC-2']}
+    assert index.match('入') == {ids['TC-1'], ids['TC-2']}
@@ -0,0 +1,63 @@
+# tests/test_run_history.py
+from extensions import db
+# 以別名匯入，避免 pytest 把 TestCase 模型當成測試類別收集
+from models import TestResult, TestRunRollup, RESULT_STATUS_CODES, TestCase as Case
+from run_history import start_run, rebuild_rollups, _adjust_rollup
+
+
+def rollups(run_id):
+    return {(row.main_category, row.status): row.count
+            for row in TestRunRollup.query.filter_by(run_id=run_id) if row.count}
+
+
+def add_cases(count):
+    cases = [Case(case_id=f'TC-{i:03d}', product_type='Smail', category='', test_item=f'項目 {i}',
+                  main_category='帳號') for i in range(count)]
+    db.session.add_all(cases)
+    db.session.commit()
+    return cases
+
+
+def test_status_changes_maintain_rollups(app):
+    run = start_run('第一輪')
+    cases = add_cases(3)
+    client = app.test_client()
+
+    for case, status in zip(cases, ['通過', '失敗', '通過']):
+        client.post(f'/edit-status-result/{case.id}', data={'status': status, 'actual_result': ''})
+    client.post(f'/edit-status-result/{cases[1].id}', data={'status': '通過', 'actual_result': ''})
+
+    expected = {('帳號', RESULT_STATUS_CODES['通過']): 3}
+    assert rollups(run.id) == expected
+    rebuild_rollups(run.id)
+    db.session.commit()
+    assert rollups(run.id) == expected
+
+
+def test_saving_the_same_status_does_not_record_a_result(app):
+    start_run('第一輪')
+    case = add_cases(1)[0]
+    client = app.test_client()
+
+    client.post(f'/edit-status-result/{case.id}', data={'status': '通過', 'actual_result': '第一次'})
+    client.post(f'/edit-status-result/{case.id}', data={'status': '通過', 'actual_result': '補充說明'})
+
+    assert TestResult.query.count() == 1
+    assert db.session.get(Case, case.id).actual_result == '補充說明'
+
+
+def test_adjust_rollup_adds_to_the_stored_count(app):
+    run = start_run('第一輪')
+    db.session.commit()
+    status = RESULT_STATUS_CODES['通過']
+
+    _adjust_rollup(run.id, '帳號', status, 1)
+    _adjust_rollup(run.id, '帳號', status, 1)
+    db.session.commit()
+    # 其他 worker 直接寫入資料庫的累加不會被這個 session 覆寫
+    with db.engine.begin() as connection:
+        connection.execute(TestRunRollup.__table__.update().values(count=TestRunRollup.count + 5))
+    _adjust_rollup(run.id, '帳號', status, -1)
+    db.session.commit()
+
+    assert rollups(run.id) == {('帳號', status): 6}
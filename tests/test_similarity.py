@@ -0,0 +1,32 @@
+# tests/test_similarity.py
+import similarity
+from similarity import compute_signature, find_near_duplicates
+
+
+def test_near_duplicates_within_a_batch(app):
+    signatures = {
+        'TC-001': compute_signature('登入系統後點選設定頁面並修改密碼確認成功'),
+        'TC-002': compute_signature('登入系統後點選設定頁面並修改密碼確認成功了'),
+        'TC-003': compute_signature('匯出報表時選擇日期區間並下載檔案'),
+    }
+
+    assert [(label, other) for label, other, _ in find_near_duplicates(signatures, 0.6)] == [('TC-002', 'TC-001')]
+
+
+def test_large_duplicate_bucket_is_capped(app, monkeypatch):
+    monkeypatch.setattr(similarity, 'MAX_BUCKET_COMPARISONS', 5)
+    compared = []
+    best_match = similarity._best_match
+
+    def counting_best_match(signature, matrix):
+        compared.append(len(matrix))
+        return best_match(signature, matrix)
+    monkeypatch.setattr(similarity, '_best_match', counting_best_match)
+
+    text = '登入系統後點選設定頁面並修改密碼確認成功' * 3
+    signatures = {f'TC-{i:03d}': compute_signature(f'{text}{i}') for i in range(200)}
+    result = find_near_duplicates(signatures, 0.6)
+
+    # 除了第一筆以外都找得到相似案例，但每筆比較的數量不隨批次大小成長
+    assert len(result) == 199
+    assert max(compared) <= 5 * similarity.BANDS
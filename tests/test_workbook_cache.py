@@ -0,0 +1,34 @@
+# tests/test_workbook_cache.py
+import os
+import time
+
+import pandas as pd
+
+from workbook_cache import WorkbookCache, TMP_GRACE_SECONDS
+
+
+def test_put_and_get_leave_no_temporary_files(tmp_path):
+    cache = WorkbookCache(str(tmp_path))
+    df = pd.DataFrame({'Case ID': ['TC-001'], '測試項目': ['登入']})
+
+    cache.put('abc', df, {'sheet_names': ['Cases'], 'preconditions_text': None})
+
+    cached_df, metadata = cache.get('abc')
+    assert cached_df.equals(df)
+    assert metadata == {'sheet_names': ['Cases'], 'preconditions_text': None}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_evict_keeps_temporary_files_that_may_still_be_written(tmp_path):
+    cache = WorkbookCache(str(tmp_path), max_bytes=0)
+    writing = tmp_path / 'new.json.123.456.tmp'
+    stale = tmp_path / 'old.json.123.456.tmp'
+    writing.write_text('{')
+    stale.write_text('{')
+    old = time.time() - TMP_GRACE_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    cache.evict()
+
+    assert writing.exists()
+    assert not stale.exists()
@@ -1,6 +1,7 @@
 # utils.py
 import os
 import json
+import hashlib
 from extensions import db
 from models import Tag
 
@@ -25,10 +26,15 @@ def process_tags(tags_string):
     db.session.flush()
     return processed_tags
 
+def get_category_rules_path():
+    """分類規則檔的位置，可用環境變數 CATEGORY_RULES_PATH 指定 (例如效能測試時使用副本)。"""
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'category_rules.json')
+    return os.environ.get('CATEGORY_RULES_PATH', default_path)
+
 def load_category_rules():
     """從 category_rules.json 檔案載入分類規則。"""
     try:
-        rules_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'category_rules.json')
+        rules_path = get_category_rules_path()
         with open(rules_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
@@ -43,7 +49,7 @@ def update_global_preconditions(product_type, new_preconditions):
     if not new_preconditions or not isinstance(new_preconditions, str):
         return # 如果沒有提供新的條件文字，則不執行任何操作
 
-    rules_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'category_rules.json')
+    rules_path = get_category_rules_path()
     
     try:
         # 讀取現有的規則
@@ -66,6 +72,27 @@ def update_global_preconditions(product_type, new_preconditions):
 # --- ▲▲▲ 修改結束 ▲▲▲ ---
 
 
+def categorization_text(case_data):
+    """categorize_case 比對關鍵字的文字 (已轉小寫)。"""
+    return (
+        f"{case_data.get('測試項目', '')} "
+        f"{case_data.get('測試目的', '')} "
+        f"{case_data.get('測試步驟', '')} "
+        f"{case_data.get('預期結果', '')} "
+        f"{case_data.get('category', '')}"
+    ).lower()
+
+def case_data_from_case(case):
+    """
+    由資料庫中的案例 (TestCase 或欄位名稱相同的資料列) 組出 fix_categories.py 重新分類時
+    交給 categorize_case 的 case_data (空值視為空字串)。
+    """
+    return {
+        '測試項目': case.test_item or '',
+        '測試步驟': case.test_steps or '',
+        'category': case.category or '',  # 原始的 Excel 工作表名稱
+    }
+
 def categorize_case(case_data, product_type):
     """
     根據載入的規則與指定的產品別，
@@ -77,13 +104,7 @@ def categorize_case(case_data, product_type):
     if not rules_for_product:
         return "其他", "未分類"
 
-    text_to_check = (
-        f"{case_data.get('測試項目', '')} "
-        f"{case_data.get('測試目的', '')} "
-        f"{case_data.get('測試步驟', '')} "
-        f"{case_data.get('預期結果', '')} "
-        f"{case_data.get('category', '')}"
-    ).lower()
+    text_to_check = categorization_text(case_data)
     
     if isinstance(rules_for_product, list) and rules_for_product and isinstance(rules_for_product[0], str):
         for keyword in rules_for_product:
@@ -97,4 +118,24 @@ def categorize_case(case_data, product_type):
                 if keyword.lower() in text_to_check:
                     return rule['main_category'], rule['sub_category']
             
-    return "其他", "未分類"
\ No newline at end of file
+    return "其他", "未分類"
+
+
+# 匯入時由 Excel 帶入、並納入內容雜湊的欄位：(TestCase 欄位, Excel 標頭)
+# 狀態、實際結果、備註、標籤與附件屬於執行紀錄，不列入，重新匯入時也不會被覆寫
+IMPORTED_FIELDS = [
+    ('category', 'category'),
+    ('test_item', '測試項目'),
+    ('test_purpose', '測試目的'),
+    ('preconditions', '前置條件'),
+    ('test_steps', '測試步驟'),
+    ('expected_result', '預期結果'),
+    ('reference', '參考資料'),
+]
+
+def compute_content_hash(product_type, values):
+    """
+    計算匯入欄位的內容雜湊 (SHA-256)。values 需依 IMPORTED_FIELDS 的順序排列。
+    """
+    payload = '\x1f'.join([product_type or ''] + ['' if v is None else str(v) for v in values])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
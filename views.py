@@ -0,0 +1,734 @@
+# views.py
+import os
+import json
+import io
+from urllib.parse import quote
+from flask import (Blueprint, current_app, render_template, request, redirect, url_for,
+                   flash, jsonify, Response, send_file, send_from_directory, stream_with_context)
+from sqlalchemy import func
+from sqlalchemy.orm import lazyload
+from werkzeug.utils import secure_filename
+import uuid
+import tempfile
+from datetime import datetime
+
+from extensions import db
+from db_concurrency import retry_on_locked, serialized_write
+from instrumentation import timed_section
+from fragment_cache import fragment_cache, render_manual_list, render_case_field_list
+from tag_index import tag_index
+from live_updates import change_feed
+from models import TestCase, Tag, Attachment, TestRun
+from run_history import get_open_run, start_run, record_result, run_trend, run_category_summary
+from services import import_uploaded_file, preview_workbook_categories
+from similarity import index_cases, find_similar_cases
+from case_filters import filters_from_args, apply_case_filters
+from case_rows import paginate_case_rows
+from case_api import MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE, parse_fields, parse_cursor, fetch_page, stream_ndjson
+from snapshot import SNAPSHOT_FORMATS, write_snapshot
+from rule_impact import rule_index, impact_to_dict
+from attachment_storage import storage_report
+from excel_export import (case_export_record, render_workbook, safe_filename, stream_workbooks_zip,
+                          unique_member_name, default_export_processes)
+from utils import categorize_case, process_tags, load_category_rules
+
+ALLOWED_EXTENSIONS = {'xlsx'}
+
+bp = Blueprint('main', __name__)
+
+
+@bp.app_context_processor
+def inject_status_options():
+    status_options = ['未執行', '進行中', '通過', '失敗']
+    return dict(status_options=status_options)
+
+@bp.route('/dashboard')
+def dashboard():
+    # ... (儀表板邏輯保持不變) ...
+    status_distribution = db.session.query(
+        TestCase.status,
+        func.count(TestCase.status)
+    ).group_by(TestCase.status).all()
+
+    pie_chart_data = {
+        'labels': [status[0] for status in status_distribution],
+        'data': [status[1] for status in status_distribution]
+    }
+
+    main_categories = db.session.query(
+        TestCase.main_category
+    ).group_by(TestCase.main_category).order_by(TestCase.main_category).all()
+
+    progress_data = []
+    for category_tuple in main_categories:
+        category_name = category_tuple[0]
+        if not category_name:
+            continue
+
+        total = TestCase.query.filter_by(main_category=category_name).count()
+        completed = TestCase.query.filter(
+            TestCase.main_category == category_name,
+            TestCase.status.in_(['通過', '失敗'])
+        ).count()
+        passed = TestCase.query.filter_by(main_category=category_name, status='通過').count()
+
+        completion_percentage = (completed / total * 100) if total > 0 else 0
+        pass_percentage = (passed / total * 100) if total > 0 else 0
+
+        progress_data.append({
+            'key': category_name,
+            'category': category_name.replace('功能', ''),
+            'total': total,
+            'completed': completed,
+            'passed': passed,
+            'completion_percentage': round(completion_percentage, 1),
+            'pass_percentage': round(pass_percentage, 1)
+        })
+
+    summary_data = {
+        'total_cases': sum(item['total'] for item in progress_data),
+        'completed_cases': sum(item['completed'] for item in progress_data),
+        'passed_cases': sum(item['passed'] for item in progress_data)
+    }
+
+    # 趨勢圖只讀取回合彙總表，不掃描原始執行紀錄
+    trend = run_trend(request.args.get('runs', 200, type=int))
+    trend_chart_data = {
+        'labels': [f"{run['name']} ({run['started_on']})" for run in trend],
+        'pass_rate': [run['pass_rate'] for run in trend],
+        'executed': [run['executed'] for run in trend],
+    }
+
+    return render_template(
+        'dashboard.html',
+        pie_chart_data=json.dumps(pie_chart_data),
+        trend_chart_data=json.dumps(trend_chart_data, ensure_ascii=False),
+        progress_data=progress_data,
+        summary_data=summary_data,
+        live_cursor=change_feed.current_cursor(),
+        hide_sidebar=True
+    )
+
+
+@bp.route('/events')
+def live_events():
+    """輪詢 after= 序號之後的案例狀態/分類變動，供儀表板與列表頁即時更新。"""
+    changes, cursor, more, resync = change_feed.changes_since(request.args.get('after', 0, type=int))
+    return jsonify({'changes': changes, 'cursor': cursor, 'more': more, 'resync': resync})
+
+
+@bp.route('/events/counts')
+def live_counts():
+    """resync 時重新讀取儀表板的數字，cursor 為這些數字對應的序號。"""
+    cursor, status_counts, categories = change_feed.counts()
+    return jsonify({'cursor': cursor, 'status': status_counts, 'categories': categories})
+
+
+@bp.route('/runs', methods=['GET', 'POST'])
+@retry_on_locked
+def test_runs():
+    if request.method == 'POST':
+        name = request.form.get('name', '').strip()
+        if not name:
+            flash('請輸入回合名稱。', 'warning')
+            return redirect(url_for('main.test_runs'))
+        run = start_run(name, request.form.get('product_type'))
+        db.session.commit()
+        flash(f'已開始測試回合 "{run.name}"，之後的狀態變更都會記錄到此回合。', 'success')
+        return redirect(url_for('main.test_runs'))
+
+    products = [row[0] for row in db.session.query(TestCase.product_type).distinct().order_by(TestCase.product_type)]
+    selected_run = None
+    run_id = request.args.get('run_id', type=int)
+    if run_id:
+        selected_run = TestRun.query.get_or_404(run_id)
+    return render_template('runs.html',
+                           runs=list(reversed(run_trend())),
+                           open_run=get_open_run(),
+                           selected_run=selected_run,
+                           category_summary=run_category_summary(run_id) if selected_run else [],
+                           products=products,
+                           hide_sidebar=True)
+
+
+@bp.route('/runs/<int:run_id>/close', methods=['POST'])
+@retry_on_locked
+def close_test_run(run_id):
+    run = TestRun.query.get_or_404(run_id)
+    if run.closed_on is None:
+        run.closed_on = datetime.utcnow()
+        db.session.commit()
+        flash(f'測試回合 "{run.name}" 已結束。', 'success')
+    return redirect(url_for('main.test_runs', run_id=run.id))
+
+
+@bp.route('/')
+def index():
+    # ... (主頁面邏輯保持不變) ...
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+    if per_page not in [10, 20, 30, 40, 50]:
+        per_page = 50
+
+    filters = filters_from_args(request.args)
+    query_string = filters.query_string
+    selected_statuses = filters.statuses
+    selected_tags = filters.tags
+    selected_product = request.args.get('product')
+    selected_main_category = request.args.get('main_category')
+    selected_sub_category = request.args.get('sub_category')
+
+    all_cases_for_tree = db.session.query(TestCase.product_type, TestCase.main_category, TestCase.sub_category).distinct().all()
+    tree_data = {}
+    for prod, main_cat, sub_cat in all_cases_for_tree:
+        prod = prod.strip() if prod else None
+        main_cat = main_cat.strip() if main_cat else None
+        sub_cat = sub_cat.strip() if sub_cat else None
+        if not prod:
+            continue
+        if prod not in tree_data:
+            tree_data[prod] = {}
+        if main_cat:
+            if main_cat not in tree_data[prod]:
+                tree_data[prod][main_cat] = []
+            if sub_cat and sub_cat not in tree_data[prod][main_cat]:
+                tree_data[prod][main_cat].append(sub_cat)
+
+    global_precondition = None
+    CATEGORY_RULES = load_category_rules()
+    global_preconditions = CATEGORY_RULES.get('global_preconditions', {})
+
+    if selected_sub_category:
+        global_precondition = global_preconditions.get(selected_sub_category)
+    if not global_precondition and selected_main_category:
+        global_precondition = global_preconditions.get(selected_main_category)
+    if not global_precondition and selected_product:
+        global_precondition = global_preconditions.get(selected_product)
+
+    # 只載入列表顯示的欄位，長文字欄位在展開時才讀取
+    pagination = paginate_case_rows(filters, page, per_page)
+    cases_to_display = pagination.items
+
+    return render_template('cases.html',
+                           cases=cases_to_display,
+                           tree_data=tree_data,
+                           pagination=pagination,
+                           selected_product=selected_product,
+                           selected_main_category=selected_main_category,
+                           selected_sub_category=selected_sub_category,
+                           global_precondition=global_precondition,
+                           per_page=per_page,
+                           selected_tags=selected_tags,
+                           selected_statuses=selected_statuses,
+                           live_cursor=change_feed.current_cursor(),
+                           query_string=query_string)
+
+
+@bp.route('/api/tags')
+def tag_autocomplete():
+    """select2 遠端查詢用：依前綴回傳標籤與使用次數。"""
+    prefix = request.args.get('q', '')
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    results = [{'id': name, 'text': name, 'count': count} for name, count in tag_index.search(prefix, limit)]
+    return jsonify({'results': results})
+
+
+@bp.route('/api/cases')
+def api_cases():
+    """
+    案例的唯讀 API，篩選參數與列表頁相同。fields= 選擇欄位，cursor= 接續上一頁的 next_cursor；
+    format=ndjson 時從 cursor 之後串流全部符合的案例。
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        cursor = parse_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    filters = filters_from_args(request.args)
+
+    if request.args.get('format') == 'ndjson':
+        return Response(stream_with_context(stream_ndjson(filters, fields, cursor)),
+                        mimetype='application/x-ndjson')
+
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    items, next_cursor = fetch_page(filters, fields, cursor, limit)
+    return jsonify({'items': items, 'next_cursor': next_cursor})
+
+
+@bp.route('/api/storage')
+def api_storage():
+    """附件容量統計：依產品與用量最大的案例 (top= 筆)。"""
+    top = max(1, min(request.args.get('top', 20, type=int), 200))
+    report = storage_report(top)
+    return jsonify({
+        'total_files': report.total_files,
+        'total_bytes': report.total_bytes,
+        'unknown_size': report.unknown_size,
+        'quarantine_files': report.quarantine_files,
+        'quarantine_bytes': report.quarantine_bytes,
+        'by_product': [{'product_type': product, 'files': files, 'bytes': size}
+                       for product, files, size in report.by_product],
+        'by_case': [{'id': id_, 'case_id': case_id, 'product_type': product, 'files': files, 'bytes': size}
+                    for id_, case_id, product, files, size in report.by_case],
+    })
+
+
+@bp.route('/delete-tag')
+@retry_on_locked
+def delete_tag():
+    case_id = request.args.get('case_id', type=int)
+    tag_name = request.args.get('tag_name')
+
+    redirect_args = request.args.to_dict()
+    redirect_args.pop('case_id', None)
+    redirect_args.pop('tag_name', None)
+
+    if case_id and tag_name:
+        case = TestCase.query.get_or_404(case_id)
+        tag_to_delete = Tag.query.filter_by(name=tag_name).first()
+
+        if tag_to_delete and tag_to_delete in case.tags:
+            case.tags.remove(tag_to_delete)
+            db.session.commit()
+            flash(f"已成功刪除標籤 '{tag_name}'", 'success')
+        else:
+            flash(f"找不到要刪除的標籤 '{tag_name}'", 'warning')
+    else:
+        flash("刪除標籤時缺少必要參數。", 'danger')
+
+    return redirect(url_for('main.index', **redirect_args))
+
+
+@bp.route('/add', methods=['GET', 'POST'])
+@retry_on_locked
+def add_case():
+    if request.method == 'POST':
+        case_data = request.form.to_dict()
+        product_type = case_data.get('product_type', '未分類產品')
+        main_cat, sub_cat = categorize_case(case_data, product_type)
+
+        new_case = TestCase(
+            product_type=case_data.get('product_type', '未分類產品'),
+            category=case_data.get('category', ''),
+            main_category=main_cat, sub_category=sub_cat,
+            case_id=case_data.get('case_id'), test_item=case_data.get('test_item'),
+            test_purpose=case_data.get('test_purpose'), preconditions=case_data.get('preconditions'),
+            test_steps=case_data.get('test_steps'), expected_result=case_data.get('expected_result'),
+            actual_result=case_data.get('actual_result'), status=case_data.get('status', '未執行'),
+            notes=case_data.get('notes'), reference=case_data.get('reference')
+        )
+        tags_string = case_data.get('tags', '')
+        new_case.tags = process_tags(tags_string)
+
+        db.session.add(new_case)
+        index_cases([new_case])
+        db.session.commit()
+        flash('測試案例已成功新增！', 'success')
+        return redirect(url_for('main.index'))
+    return render_template('case_form.html', title="新增測試案例", case=None)
+
+@bp.route('/edit/<int:id>', methods=['GET', 'POST'])
+@retry_on_locked
+def edit_case(id):
+    case_to_edit = TestCase.query.get_or_404(id)
+    if request.method == 'POST':
+        case_data = request.form.to_dict()
+        product_type = case_data.get('product_type')
+        main_cat, sub_cat = categorize_case(case_data, product_type)
+
+        case_to_edit.product_type = case_data.get('product_type')
+        case_to_edit.category = case_data.get('category')
+        case_to_edit.main_category = main_cat
+        case_to_edit.sub_category = sub_cat
+        case_to_edit.case_id = case_data.get('case_id')
+        case_to_edit.test_item = case_data.get('test_item')
+        case_to_edit.test_purpose = case_data.get('test_purpose')
+        case_to_edit.preconditions = case_data.get('preconditions')
+        case_to_edit.test_steps = case_data.get('test_steps')
+        case_to_edit.expected_result = case_data.get('expected_result')
+        case_to_edit.actual_result = case_data.get('actual_result')
+        status_changed = case_to_edit.status != case_data.get('status')
+        case_to_edit.status = case_data.get('status')
+        case_to_edit.notes = case_data.get('notes')
+        case_to_edit.reference = case_data.get('reference')
+
+        tags_string = case_data.get('tags', '')
+        case_to_edit.tags = process_tags(tags_string)
+
+        if status_changed:
+            record_result(case_to_edit)
+        index_cases([case_to_edit])
+        db.session.commit()
+        flash('測試案例已成功更新！', 'success')
+        return redirect(url_for('main.index'))
+    return render_template('case_form.html', title="編輯測試案例", case=case_to_edit)
+
+@bp.route('/delete/<int:id>', methods=['POST'])
+@retry_on_locked
+def delete_case(id):
+    case_to_delete = TestCase.query.get_or_404(id)
+    db.session.delete(case_to_delete)
+    db.session.commit()
+    return '', 200
+
+@bp.route('/edit-status-result/<int:id>', methods=['GET', 'POST'])
+@retry_on_locked
+def edit_status_result(id):
+    case = TestCase.query.get_or_404(id)
+    if request.method == 'POST':
+        status_changed = case.status != request.form.get('status')
+        case.status = request.form.get('status')
+        case.actual_result = request.form.get('actual_result', '')
+        # 只修改實際結果時不重複記錄執行結果
+        if status_changed:
+            record_result(case)
+        db.session.commit()
+        return render_template('partials/_status_result_display.html', case=case)
+    return render_template('partials/_status_result_edit.html', case=case)
+
+@bp.route('/display-status-result/<int:id>')
+def display_status_result(id):
+    case = TestCase.query.get_or_404(id)
+    return render_template('partials/_status_result_display.html', case=case)
+
+@bp.route('/bulk-add-tag', methods=['POST'])
+@retry_on_locked
+def bulk_add_tag():
+    case_ids = request.form.getlist('case_ids')
+    redirect_params = {k: v for k, v in request.form.items() if k not in ['case_ids', 'new_tag']}
+
+    # 與編輯案例相同，以逗號分隔、去空白並轉小寫；標籤名稱不能含逗號 (tag_names 以逗號串接)
+    tags_to_add = list(dict.fromkeys(process_tags(request.form.get('new_tag', '')))) if case_ids else []
+    if not tags_to_add:
+        flash('未選擇任何案例或未輸入標籤。', 'warning')
+        return redirect(url_for('main.index', **redirect_params))
+
+    cases_to_update = TestCase.query.filter(TestCase.id.in_(case_ids)).all()
+    for case in cases_to_update:
+        for tag in tags_to_add:
+            if tag not in case.tags:
+                case.tags.append(tag)
+
+    db.session.commit()
+    tag_list = '", "'.join(tag.name for tag in tags_to_add)
+    flash(f'已為 {len(case_ids)} 個案例成功新增標籤 "{tag_list}"！', 'success')
+    return redirect(url_for('main.index', **redirect_params))
+
+@bp.route('/bulk-delete', methods=['POST'])
+@retry_on_locked
+def bulk_delete():
+    case_ids = request.form.getlist('case_ids')
+    redirect_params = {k: v for k, v in request.form.items() if k != 'case_ids'}
+
+    if not case_ids:
+        flash('未選擇任何案例。', 'warning')
+        return redirect(url_for('main.index', **redirect_params))
+
+    cases_to_delete = TestCase.query.filter(TestCase.id.in_(case_ids)).all()
+
+    # 附件檔案由 attachment_storage 在 commit 成功後移除
+    for case in cases_to_delete:
+        db.session.delete(case)
+
+    db.session.commit()
+
+    flash(f'已成功刪除 {len(cases_to_delete)} 個案例！', 'success')
+    return redirect(url_for('main.index', **redirect_params))
+
+@retry_on_locked
+def _save_notes(case_id, notes, new_file):
+    """寫入備註與新附件的資料列 (new_file 為已存好的 (原始檔名, 儲存檔名, 大小))。"""
+    case = TestCase.query.get_or_404(case_id)
+    case.notes = notes
+    if new_file:
+        filename, filepath, size = new_file
+        # 透過關聯新增，讓案例的 version 跟著遞增
+        case.attachments.append(Attachment(filename=filename, filepath=filepath, size=size))
+    db.session.commit()
+    return case
+
+@retry_on_locked
+def _remove_attachment(attachment_id):
+    """刪除附件的資料列；檔案由 attachment_storage 在 commit 成功後才移除。"""
+    attachment = Attachment.query.get_or_404(attachment_id)
+    case = TestCase.query.get_or_404(attachment.test_case_id)
+    # delete-orphan cascade 會刪除附件，同時讓案例的 version 遞增
+    case.attachments.remove(attachment)
+    db.session.commit()
+    return case
+
+@bp.route('/edit-notes/<int:id>', methods=['GET', 'POST'])
+def edit_notes(id):
+    case = TestCase.query.get_or_404(id)
+    if request.method == 'POST':
+        # 附件檔案在重試範圍外先存好，資料庫鎖定而重試時不會重複存檔
+        new_file = None
+        file = request.files.get('attachment')
+        if file and file.filename != '':
+            original_filename = secure_filename(file.filename)
+            unique_filename = f"{uuid.uuid4().hex}_{original_filename}"
+            file_path = os.path.join(current_app.config['ATTACHMENT_FOLDER'], unique_filename)
+            file.save(file_path)
+            new_file = (original_filename, unique_filename, os.path.getsize(file_path))
+
+        try:
+            case = _save_notes(id, request.form.get('notes', ''), new_file)
+        except Exception:
+            # 沒有寫入資料庫的檔案直接移除，不留給孤兒回收作業
+            if new_file:
+                os.remove(file_path)
+            raise
+        response = Response(render_template('partials/_notes_display.html', case=case))
+        response.headers['HX-Trigger'] = f'refreshDetails-{case.id}'
+        return response
+
+    return render_template('partials/_notes_edit.html', case=case)
+
+@bp.route('/display-notes/<int:id>')
+def display_notes(id):
+    case = TestCase.query.get_or_404(id)
+    return render_template('partials/_notes_display.html', case=case)
+
+@bp.route('/uploads/attachments/<path:filename>')
+def serve_attachment(filename):
+    return send_from_directory(current_app.config['ATTACHMENT_FOLDER'], filename)
+
+@bp.route('/download/attachments/<path:filename>')
+def download_attachment(filename):
+    return send_from_directory(current_app.config['ATTACHMENT_FOLDER'], filename, as_attachment=True)
+
+@bp.route('/attachments/delete/<int:attachment_id>', methods=['POST'])
+def delete_attachment(attachment_id):
+    case = _remove_attachment(attachment_id)
+    response = Response(render_template('partials/_notes_edit.html', case=case))
+    response.headers['HX-Trigger'] = f'refreshDetails-{case.id}'
+    return response
+
+@bp.route('/case-details/<int:id>/similar')
+def similar_cases(id):
+    case = TestCase.query.get_or_404(id)
+    return render_template('partials/_similar_cases.html', case=case, similar=find_similar_cases(case))
+
+@bp.route('/case-details/<int:id>')
+def get_case_details(id):
+    case = TestCase.query.get_or_404(id)
+    return render_template('partials/_case_details_content.html', case=case)
+
+# --- ▼▼▼ 清單與列表列的 HTML 片段改由 fragment_cache 快取 ▼▼▼ ---
+@bp.app_context_processor
+def utility_processor():
+    def render_case_row(case, row_context):
+        # 列內的刪除標籤連結帶有目前的篩選參數，因此也要納入 key
+        key = ('case_row', case.id, case.version, tuple(sorted(row_context.items())))
+        return fragment_cache.get_or_render(
+            key, lambda: render_template('partials/_case_row.html', case=case, **row_context)
+        )
+    return dict(render_manual_list=render_manual_list,
+                render_case_field_list=render_case_field_list,
+                render_case_row=render_case_row)
+# --- ▲▲▲ 修改結束 ▲▲▲ ---
+
+@bp.route('/upload', methods=['GET', 'POST'])
+def upload_page():
+    if request.method == 'POST':
+        selected_product_type = request.form.get('product_type')
+        if not selected_product_type:
+            flash('請務必選擇要匯入的產品類型！', 'danger')
+            return redirect(request.url)
+
+        uploaded_files = request.files.getlist('files')
+        if not uploaded_files or uploaded_files[0].filename == '':
+            flash('未選擇任何檔案', 'warning')
+            return redirect(request.url)
+
+        upsert = request.form.get('upsert') == '1'
+        force = request.form.get('force') == '1'
+
+        # 試算只讀取資料庫，不需要排入寫入佇列
+        if request.form.get('dry_run') == '1':
+            for file in uploaded_files:
+                if file and allowed_file(file.filename):
+                    filename = secure_filename(file.filename)
+                    try:
+                        file_bytes = file.read()
+                        result, _ = import_uploaded_file(file_bytes, filename, selected_product_type,
+                                                         upsert=upsert, dry_run=True)
+                        categories = preview_workbook_categories(file_bytes, filename, selected_product_type)
+                    except Exception as e:
+                        flash(f'處理檔案 "{filename}" 時發生錯誤：{e}', 'danger')
+                        db.session.rollback()
+                        continue
+                    category_summary = '、'.join(
+                        f'{main_cat} / {sub_cat}：{count}' if sub_cat else f'{main_cat}：{count}'
+                        for (main_cat, sub_cat), count in categories.most_common()
+                    )
+                    flash(f'[試算] "{filename}" 共 {result.case_count} 筆案例，將新增 {result.imported} 筆、'
+                          f'更新 {result.updated} 筆、{result.unchanged} 筆未變動。分類結果：{category_summary}', 'info')
+                    flash_near_duplicates(filename, result.near_duplicates)
+            return redirect(request.url)
+
+        skipped_files = []
+        total_imported_count = 0
+        total_updated_count = 0
+        total_unchanged_count = 0
+        has_error = False
+
+        # 匯入屬於長時間寫入，透過 serialized_write 排隊，避免與其他 worker 互相鎖定
+        with serialized_write():
+            for file in uploaded_files:
+                if file and allowed_file(file.filename):
+                    filename = secure_filename(file.filename)
+                    try:
+                        result, record = import_uploaded_file(file.read(), filename, selected_product_type,
+                                                              upsert=upsert, force=force)
+                        if result is None:
+                            skipped_files.append(f'{filename} ({record.imported_on:%Y-%m-%d %H:%M})')
+                            continue
+                        total_imported_count += result.imported
+                        total_updated_count += result.updated
+                        total_unchanged_count += result.unchanged
+                        flash_near_duplicates(filename, result.near_duplicates)
+                    except Exception as e:
+                        has_error = True
+                        flash(f'處理檔案 "{filename}" 時發生錯誤：{e}', 'danger')
+                        db.session.rollback()
+                        break
+
+        if skipped_files:
+            flash(f'以下檔案先前已匯入過相同內容，已略過 (如需重新匯入請勾選「強制重新匯入」)：{"、".join(skipped_files)}', 'info')
+
+        all_skipped = len(skipped_files) == len(uploaded_files)
+        if not has_error and (total_imported_count > 0 or total_updated_count > 0):
+            message = f'所有檔案處理完畢！共成功匯入 {total_imported_count} 筆新案例到 "{selected_product_type}" 分類中！'
+            if upsert:
+                message += f' 更新 {total_updated_count} 筆，{total_unchanged_count} 筆內容未變動。'
+            flash(message, 'success')
+        elif not has_error and not all_skipped and upsert:
+            flash(f'所有檔案處理完畢，{total_unchanged_count} 筆已存在的案例內容皆未變動。', 'info')
+        elif not has_error and not all_skipped:
+            flash('所有檔案處理完畢，但沒有匯入任何新案例 (可能 Case ID 皆已存在)。', 'info')
+
+        return redirect(url_for('main.index'))
+
+    return render_template('upload.html')
+
+def flash_near_duplicates(filename, near_duplicates, limit=5):
+    if not near_duplicates:
+        return
+    examples = '、'.join(f'{case_id} ≈ {other} ({score:.0%})' for case_id, other, score in near_duplicates[:limit])
+    more = f' 等 {len(near_duplicates)} 筆' if len(near_duplicates) > limit else ''
+    flash(f'"{filename}" 中有案例與既有案例高度相似，請確認是否重複：{examples}{more}', 'warning')
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+@bp.route('/export')
+def export_cases():
+    filters = filters_from_args(request.args)
+    product, main_category, sub_category = filters.product, filters.main_category, filters.sub_category
+
+    # 標籤取自 tag_names，不需要預先載入 tags 關聯
+    cases_to_export = (apply_case_filters(TestCase.query.options(lazyload(TestCase.tags)), filters)
+                       .order_by(TestCase.case_id).all())
+
+    if not cases_to_export:
+        flash('沒有符合目前篩選條件的資料可供匯出。', 'warning')
+        return redirect(request.referrer or url_for('main.index'))
+
+    data_for_df = [case_export_record(case) for case in cases_to_export]
+
+    with timed_section('excel'):
+        output = io.BytesIO(render_workbook(data_for_df))
+
+    filename = "test_cases_export.xlsx"
+    if sub_category:
+        filename = f"{sub_category}.xlsx"
+    elif main_category:
+        filename = f"{main_category.replace('功能', '')}.xlsx"
+    elif product:
+        filename = f"{product}.xlsx"
+
+    return Response(
+        output,
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"
+        }
+    )
+
+
+@bp.route('/export/zip')
+def export_zip():
+    """依子分類各產生一個 xlsx，平行產生並邊完成邊串流成 ZIP。"""
+    filters = filters_from_args(request.args)
+    if not filters.product and not filters.main_category:
+        flash('請先選擇產品或主分類再進行批次匯出。', 'warning')
+        return redirect(request.referrer or url_for('main.index'))
+
+    cases_to_export = (apply_case_filters(TestCase.query.options(lazyload(TestCase.tags)), filters)
+                       .order_by(TestCase.main_category, TestCase.sub_category, TestCase.case_id).all())
+    if not cases_to_export:
+        flash('沒有符合目前篩選條件的資料可供匯出。', 'warning')
+        return redirect(request.referrer or url_for('main.index'))
+
+    groups = {}
+    member_names = {}
+    used_names = set()
+    for case in cases_to_export:
+        key = (case.main_category or '', case.sub_category or '未分類')
+        if key not in member_names:
+            sub_name = safe_filename(key[1])
+            if filters.main_category:
+                name = f'{sub_name}.xlsx'
+            else:
+                main_name = safe_filename(key[0].replace('功能', '') or '未分類')
+                name = f'{main_name}/{sub_name}.xlsx'
+            member_names[key] = unique_member_name(name, used_names)
+        groups.setdefault(member_names[key], []).append(case_export_record(case))
+
+    max_workers = current_app.config.get('EXPORT_PROCESSES') or default_export_processes()
+    zip_name = (filters.main_category or filters.product).replace('功能', '')
+    return Response(
+        stream_workbooks_zip(groups, max_workers),
+        mimetype='application/zip',
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(zip_name)}.zip"
+        }
+    )
+
+
+@bp.route('/rules/preview', methods=['POST'])
+def preview_rules():
+    """
+    以 JSON 傳入提議的分類規則 ({產品: 規則串列}，格式同 category_rules.json，未列出的產品視為不變)，
+    回傳套用後會移動的案例與依分類統計的數量，不會修改規則或資料庫。
+    """
+    limit = request.args.get('limit', 500, type=int)
+    try:
+        with timed_section('rule_preview'):
+            impact = rule_index.preview(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(impact_to_dict(impact, limit))
+
+
+@bp.route('/export/snapshot')
+def export_snapshot():
+    """以 Parquet (預設) 或 Arrow IPC 匯出案例與標籤，可套用與列表相同的篩選條件。"""
+    fmt = request.args.get('format', 'parquet')
+    if fmt not in SNAPSHOT_FORMATS:
+        return jsonify({'error': f'不支援的格式：{fmt}'}), 400
+
+    output = tempfile.TemporaryFile()
+    try:
+        with timed_section('snapshot'):
+            write_snapshot(output, filters_from_args(request.args), fmt)
+    except RuntimeError as e:
+        output.close()
+        return jsonify({'error': str(e)}), 501
+    output.seek(0)
+
+    extension, mimetype = SNAPSHOT_FORMATS[fmt]
+    filename = f"test_cases_snapshot_{datetime.now():%Y%m%d_%H%M%S}{extension}"
+    return send_file(output, mimetype=mimetype, as_attachment=True, download_name=filename)
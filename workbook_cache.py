@@ -0,0 +1,133 @@
+# workbook_cache.py
+"""
+已解析活頁簿的快取。
+
+以檔案內容的 SHA-256 為 key，將找出標頭、合併工作表並正規化後的案例表格
+存成 Parquet (有安裝 pyarrow 時) 或 pickle，旁邊另存一份 JSON 記錄工作表名稱
+與前置條件文字。同一份檔案之後的匯入、試算與分類預覽可直接載入，
+不必再透過 openpyxl 解析 xlsx。快取總大小超過上限時，依最後使用時間淘汰。
+"""
+import os
+import json
+import time
+import threading
+import importlib.util
+
+# 只檢查是否安裝，不在這裡 import，以免拖慢啟動
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+# 超過這個秒數的暫存檔視為寫入中途失敗留下的檔案，淘汰時一併刪除；較新的可能仍在寫入
+TMP_GRACE_SECONDS = 3600
+
+
+class WorkbookCache:
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.setdefault(
+            'WORKBOOK_CACHE_DIR', os.path.join(app.instance_path, 'workbook_cache'))
+        self.max_bytes = app.config.setdefault('WORKBOOK_CACHE_MAX_BYTES', self.max_bytes)
+        os.makedirs(self.directory, exist_ok=True)
+        app.extensions['workbook_cache'] = self
+
+    @property
+    def extension(self):
+        return '.parquet' if HAS_PYARROW else '.pkl'
+
+    def _paths(self, digest):
+        base = os.path.join(self.directory, digest)
+        return base + self.extension, base + '.json'
+
+    def get(self, digest):
+        """回傳 (DataFrame, metadata)，沒有快取時回傳 None。"""
+        if not self.directory:
+            return None
+        import pandas as pd
+
+        data_path, meta_path = self._paths(digest)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            if HAS_PYARROW:
+                df = pd.read_parquet(data_path)
+            else:
+                df = pd.read_pickle(data_path)
+        except (OSError, ValueError):
+            return None
+
+        # 更新存取時間，作為 LRU 淘汰的依據
+        for path in (data_path, meta_path):
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+        return df, metadata
+
+    def put(self, digest, df, metadata):
+        if not self.directory:
+            return
+        data_path, meta_path = self._paths(digest)
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        tmp_data_path = data_path + suffix
+        tmp_meta_path = meta_path + suffix
+        try:
+            if HAS_PYARROW:
+                df.to_parquet(tmp_data_path, index=False)
+            else:
+                df.to_pickle(tmp_data_path)
+            with open(tmp_meta_path, 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, ensure_ascii=False)
+            # 先寫入暫存檔再改名，避免其他 worker 讀到寫到一半的檔案；
+            # get 先讀 metadata，因此資料檔要先就位
+            os.replace(tmp_data_path, data_path)
+            os.replace(tmp_meta_path, meta_path)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"警告：無法寫入活頁簿快取 {digest} - {e}")
+            for path in (tmp_data_path, tmp_meta_path, data_path, meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        刪除最久未使用的快取，直到總大小低於上限。
+        其他行程可能正在寫入暫存檔，只刪除超過 TMP_GRACE_SECONDS 的暫存檔。
+        """
+        with self._lock:
+            entries = {}
+            now = time.time()
+            for entry in os.scandir(self.directory):
+                if not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith('.tmp'):
+                    if now - stat.st_mtime > TMP_GRACE_SECONDS:
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+                    continue
+                digest = entry.name.split('.', 1)[0]
+                size, last_used, paths = entries.get(digest, (0, 0, []))
+                entries[digest] = (size + stat.st_size, max(last_used, stat.st_mtime), paths + [entry.path])
+
+            total = sum(size for size, _, _ in entries.values())
+            for digest, (size, _, paths) in sorted(entries.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+
+
+workbook_cache = WorkbookCache()